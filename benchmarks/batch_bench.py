@@ -0,0 +1,51 @@
+"""Run BatchAnalyzer against the local fake API with injected failures.
+
+    python -m benchmarks.batch_bench --images 200 --concurrency 16 --failure-rate 0.1
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from PIL import Image
+
+from benchmarks.fake_anthropic import FakeAnthropicServer
+from example1.batch import BatchAnalyzer
+
+
+async def _run(args, base_url):
+    analyzer = BatchAnalyzer(api_key="test", base_url=base_url, concurrency=args.concurrency,
+                             requests_per_minute=args.rpm, tokens_per_minute=args.tpm)
+    images = (Image.new("RGB", (1920, 1080), (i % 256, 40, 90)) for i in range(args.images))
+    results = []
+    start = time.perf_counter()
+    async for result in analyzer.analyze_many(images, "Describe this"):
+        results.append(result)
+    elapsed = time.perf_counter() - start
+    await analyzer.close()
+    return results, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    parser.add_argument("--rpm", type=float, default=6000)
+    parser.add_argument("--tpm", type=float, default=10_000_000)
+    args = parser.parse_args(argv)
+
+    with FakeAnthropicServer(latency=args.latency, failure_rate=args.failure_rate) as server:
+        results, elapsed = asyncio.run(_run(args, server.base_url))
+        failed = [r for r in results if not r.ok]
+        latencies = sorted(r.latency for r in results)
+        print(f"{len(results)} images in {elapsed:.2f}s ({len(results) / elapsed:.1f}/s), "
+              f"{server.requests} requests, {server.failures} injected failures, {len(failed)} gave up")
+        print(f"latency p50 {statistics.median(latencies) * 1000:.0f} ms, "
+              f"max {latencies[-1] * 1000:.0f} ms, "
+              f"mean attempts {statistics.mean(r.attempts for r in results):.2f}")
+
+
+if __name__ == "__main__":
+    main()
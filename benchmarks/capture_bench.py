@@ -0,0 +1,85 @@
+"""Compare the legacy PNG round trip against the in-memory capture path.
+
+Run from the project root:
+
+    python -m benchmarks.capture_bench            # synthetic 3x4K frame
+    python -m benchmarks.capture_bench --live     # real grab of monitor 0
+
+Each path runs in its own process so the reported peak RSS is not polluted
+by the other one.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+
+import mss
+import mss.tools
+from PIL import Image
+
+from benchmarks.fake_mss import synthetic_frame
+from example1.screenshot_manager import ScreenshotManager
+
+
+def legacy_path(screenshot):
+    """The original compress-write-read-decode round trip"""
+    temp_filename = "temp_screenshot.png"
+    mss.tools.to_png(screenshot.rgb, screenshot.size, output=temp_filename)
+    image = Image.open(temp_filename)
+    image.load()
+    os.remove(temp_filename)
+    return image
+
+
+def in_memory_path(screenshot):
+    return ScreenshotManager.to_image(screenshot)
+
+
+PATHS = {"legacy": legacy_path, "in-memory": in_memory_path}
+
+
+def _grab_live():
+    with mss.mss() as sct:
+        return sct.grab(sct.monitors[0])
+
+
+def _run(mode, width, height, repeat, live, results):
+    convert = PATHS[mode]
+    timings = []
+    for _ in range(repeat):
+        # Grab cost is identical for both paths, so only conversion is timed
+        screenshot = _grab_live() if live else synthetic_frame(width, height)
+        start = time.perf_counter()
+        image = convert(screenshot)
+        timings.append(time.perf_counter() - start)
+        del image, screenshot
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    results.put((mode, timings, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=3 * 3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--live", action="store_true", help="grab the real screen instead of a synthetic frame")
+    args = parser.parse_args(argv)
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    print(f"{'path':<10} {'median ms':>10} {'min ms':>10} {'peak RSS MiB':>13}")
+    for mode in PATHS:
+        proc = ctx.Process(target=_run, args=(mode, args.width, args.height, args.repeat, args.live, results))
+        proc.start()
+        name, timings, peak = results.get()
+        proc.join()
+        print(f"{name:<10} {statistics.median(timings) * 1000:>10.1f} "
+              f"{min(timings) * 1000:>10.1f} {peak / 2**20:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Local stand-in for the Anthropic messages endpoint.
+
+Serves POST /v1/messages (plain and ``"stream": true`` SSE) with a
+configurable latency, injectable failures and slow tail requests, so the
+clients in example1 can be exercised without network access or API spend:
+
+    with FakeAnthropicServer(latency=0.2, failure_rate=0.1) as server:
+        analyzer = BatchAnalyzer(api_key="test", base_url=server.base_url)
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import sys
+import threading
+import time
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # socketserver's default backlog of 5 drops connection bursts (tiled
+    # analysis opens one per tile) and the client waits a SYN retransmit
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # Clients that give up (timeouts, hedging) hang up mid-response
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+class FakeAnthropicServer:
+    def __init__(self, latency=0.05, jitter=0.0, failure_rate=0.0,
+                 failure_statuses=(429, 500, 529), reply="Fake analysis of the screenshot.",
+                 chunk_delay=0.005, tail_rate=0.0, tail_latency=1.0, port=0):
+        self.latency = latency
+        self.jitter = jitter
+        # Fraction of requests that take tail_latency instead of latency
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.failure_rate = failure_rate
+        self.failure_statuses = failure_statuses
+        # Outcomes for the next requests, before failure_rate applies:
+        # (status, retry-after header or None); status None succeeds
+        self.script = []
+        self.reply = reply
+        self.chunk_delay = chunk_delay
+        self.requests = 0
+        self.failures = 0
+        # TCP connections accepted; fewer than requests means keep-alive works
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(0)
+        self._server = _QuietServer(("127.0.0.1", port), self._handler())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _next_outcome(self):
+        """Decide latency, failure and retry-after for one request (thread-safe, seeded)"""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            if self._random.random() < self.tail_rate:
+                delay = self.tail_latency
+            if self.script:
+                status, retry_after = self.script.pop(0)
+                if status is not None:
+                    self.failures += 1
+                return delay, status, retry_after
+            status = retry_after = None
+            if self._random.random() < self.failure_rate:
+                self.failures += 1
+                status = self._random.choice(self.failure_statuses)
+                retry_after = "0.05" if status == 429 else None
+            return delay, status, retry_after
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def do_HEAD(self):
+                # Connection warm-up; answer without closing the connection
+                self.send_response(200)
+                self.send_header("content-length", "0")
+                self.end_headers()
+
+            def _send_json(self, status, body, headers=()):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(data)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_event(self, event, data):
+                self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+                self.wfile.flush()
+
+            def do_POST(self):
+                length = int(self.headers.get("content-length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if self.path.rstrip("/") != "/v1/messages":
+                    self._send_json(404, {"type": "error", "error": {"type": "not_found_error",
+                                                                     "message": self.path}})
+                    return
+
+                delay, status, retry_after = server._next_outcome()
+                time.sleep(delay)
+                if status is not None:
+                    kind = "rate_limit_error" if status == 429 else "api_error"
+                    headers = [("retry-after", retry_after)] if retry_after is not None else []
+                    self._send_json(status, {"type": "error",
+                                             "error": {"type": kind, "message": "injected failure"}},
+                                    headers)
+                    return
+
+                input_tokens = len(json.dumps(request.get("messages", []))) // 4
+                words = server.reply.split(" ")
+                usage = {"input_tokens": input_tokens, "output_tokens": len(words)}
+                message = {
+                    "id": "msg_fake", "type": "message", "role": "assistant",
+                    "model": request.get("model", "fake"), "stop_reason": "end_turn",
+                    "stop_sequence": None, "usage": usage,
+                    "content": [{"type": "text", "text": server.reply}],
+                }
+                if not request.get("stream"):
+                    self._send_json(200, message)
+                    return
+
+                self.send_response(200)
+                self.send_header("content-type", "text/event-stream")
+                self.send_header("connection", "close")
+                self.end_headers()
+                self._send_event("message_start", {"type": "message_start", "message": dict(
+                    message, content=[], stop_reason=None, usage=dict(usage, output_tokens=0))})
+                self._send_event("content_block_start", {"type": "content_block_start", "index": 0,
+                                                         "content_block": {"type": "text", "text": ""}})
+                for i, word in enumerate(words):
+                    text = word if i == 0 else " " + word
+                    self._send_event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                             "delta": {"type": "text_delta", "text": text}})
+                    time.sleep(server.chunk_delay)
+                self._send_event("content_block_stop", {"type": "content_block_stop", "index": 0})
+                self._send_event("message_delta", {"type": "message_delta",
+                                                   "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                                   "usage": {"output_tokens": len(words)}})
+                self._send_event("message_stop", {"type": "message_stop"})
+                self.close_connection = True
+
+        return Handler
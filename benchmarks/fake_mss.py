@@ -0,0 +1,71 @@
+"""Headless stand-in for mss with synthetic screen contents.
+
+Plugs into CaptureSession(backend=...) so the capture path runs without a
+display:
+
+    session = CaptureSession(backend=lambda: FakeMSS(LAYOUTS["4k"]))
+    manager = ScreenshotManager(session=session)
+
+Frames are deterministic (seeded) and look roughly like a desktop: a flat
+background, lines of dark text-like runs and a noisy photo-like panel, so
+the encode stages see realistic content rather than pure noise.
+"""
+import os
+
+import numpy as np
+from mss.screenshot import ScreenShot
+
+# Physical monitors as (left, top, width, height)
+LAYOUTS = {
+    "1080p": [(0, 0, 1920, 1080)],
+    "4k": [(0, 0, 3840, 2160)],
+    "multi": [(0, 0, 1920, 1080), (1920, 0, 3840, 2160), (5760, 0, 1920, 1080)],
+}
+
+
+def synthetic_frame(width, height):
+    """Build an mss ScreenShot filled with a repeating noise band"""
+    band = bytearray(os.urandom(width * 4 * 16))
+    data = band * (height // 16) + band[: width * 4 * (height % 16)]
+    monitor = {"left": 0, "top": 0, "width": width, "height": height}
+    return ScreenShot(data, monitor)
+
+
+def synthetic_desktop(width, height, seed=0):
+    """BGRA array of a desktop-like image"""
+    rng = np.random.default_rng(seed)
+    desktop = np.full((height, width, 4), 238, dtype=np.uint8)
+    desktop[..., 3] = 255
+    # Lines of "text": short dark runs every 24 px
+    for top in range(40, height - 40, 24):
+        x = 40
+        while x < width // 2:
+            word = int(rng.integers(12, 80))
+            desktop[top:top + 10, x:x + word, :3] = 30
+            x += word + int(rng.integers(6, 14))
+    # A photo-like panel on the right half
+    panel = desktop[height // 8: height * 7 // 8, width // 2 + 40: width - 40, :3]
+    panel[:] = rng.integers(0, 256, size=panel.shape, dtype=np.uint8)
+    return desktop
+
+
+class FakeMSS:
+    """The subset of mss.mss() that CaptureSession and ScreenshotManager use"""
+
+    def __init__(self, layout, seed=0):
+        right = max(left + width for left, top, width, height in layout)
+        bottom = max(top + height for left, top, width, height in layout)
+        self.monitors = [{"left": 0, "top": 0, "width": right, "height": bottom}]
+        self.monitors += [{"left": l, "top": t, "width": w, "height": h} for l, t, w, h in layout]
+        self._desktop = synthetic_desktop(right, bottom, seed)
+        self.grabs = 0
+
+    def grab(self, area):
+        left, top = area["left"], area["top"]
+        rows = self._desktop[top:top + area["height"], left:left + area["width"]]
+        # Copy out like a real grab does; the desktop buffer stays untouched
+        self.grabs += 1
+        return ScreenShot(bytearray(rows.tobytes()), dict(area))
+
+    def close(self):
+        self._desktop = None
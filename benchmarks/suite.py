@@ -0,0 +1,333 @@
+"""Headless benchmark suite for the capture, history, crop, preview, encode and analysis paths.
+
+Run from the project root:
+
+    python -m benchmarks.suite                      # run and compare with baseline.json
+    python -m benchmarks.suite --stage capture      # only stages starting with "capture"
+    python -m benchmarks.suite --update-baseline    # record this machine's numbers
+
+Captures go through a FakeMSS backend (synthetic 1080p, 4K and three-monitor
+desktops) and analysis through FakeAnthropicServer, so nothing needs a
+display, network access or an API key. Each stage runs in its own spawned
+process so its peak RSS is not inflated by the stages before it.
+
+A stage regresses when its median is more than --tolerance slower than the
+baseline (and by at least MIN_DELTA_MS), or its peak RSS grew by more than
+--rss-tolerance (and at least MIN_DELTA_MIB). Any regression makes the run
+exit with status 1. Baselines are machine specific: re-record them with
+--update-baseline on the machine that runs the comparison.
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Absolute slack so sub-millisecond stages and allocator noise don't flap
+MIN_DELTA_MS = 0.5
+MIN_DELTA_MIB = 8.0
+
+
+def _capture(layout, region=None):
+    def setup(options, stack):
+        from benchmarks.fake_mss import LAYOUTS, FakeMSS
+        from example1.capture_session import CaptureSession
+        from example1.screenshot_manager import ScreenshotManager
+
+        session = CaptureSession(backend=lambda: FakeMSS(LAYOUTS[layout]))
+        stack.callback(session.close)
+        manager = ScreenshotManager(session=session)
+        return lambda i: manager.capture_screen(monitor=0, region=region)
+    return setup
+
+
+def _desktop_image(layout):
+    from benchmarks.fake_mss import LAYOUTS, FakeMSS
+    from example1.screenshot_manager import ScreenshotManager
+
+    sct = FakeMSS(LAYOUTS[layout])
+    return ScreenshotManager.to_image(sct.grab(sct.monitors[0]))
+
+
+def _history(options, stack):
+    import tempfile
+    from benchmarks.fake_mss import LAYOUTS, FakeMSS
+    from example1.capture_session import CaptureSession
+    from example1.image_history import ImageHistory
+    from example1.screenshot_manager import ScreenshotManager
+
+    # Captures keep coming; peak RSS should level off at about the budget
+    session = CaptureSession(backend=lambda: FakeMSS(LAYOUTS["multi"]))
+    stack.callback(session.close)
+    history = ImageHistory(budget_mb=128, directory=stack.enter_context(tempfile.TemporaryDirectory()))
+    stack.callback(history.close)
+    manager = ScreenshotManager(session=session, history=history)
+    return lambda i: manager.capture_screen(monitor=0)
+
+
+def _page_in(options, stack):
+    import tempfile
+    from example1.image_history import ImageHistory
+
+    # Room for one 4K capture, so every lookup reads one back from disk
+    history = ImageHistory(budget_mb=40, directory=stack.enter_context(tempfile.TemporaryDirectory()))
+    stack.callback(history.close)
+    image = _desktop_image("4k")
+    entries = [history.add(image.copy()) for _ in range(3)]
+    history.flush()
+    del image
+    return lambda i: history.image(entries[i % len(entries)].id)
+
+
+def _crop_view(options, stack):
+    from example1.crop_view import CropView
+
+    image = _desktop_image("4k")
+
+    def op(i):
+        # Two nested crops and an undo/redo, then the pixels for saving
+        view = CropView(image)
+        view.crop((i % 64, 100, 3000, 2000))
+        view.crop((200, 200, 1800, 1200))
+        view.undo()
+        view.redo()
+        return view.materialize()
+    return op
+
+
+def _crop_image(options, stack):
+    from example1.screenshot_manager import ScreenshotManager
+
+    manager = ScreenshotManager()
+    image = _desktop_image("4k")
+    return lambda i: manager.crop_image(image, (i % 64, 100, 3000, 2000))
+
+
+def _preview(warm):
+    # The Tk half of ScreenshotUI._update_preview needs a display; this is
+    # the PreviewRenderer work it does before handing pixels to PhotoImage
+    def setup(options, stack):
+        from example1.preview import PreviewRenderer
+
+        image = _desktop_image("4k")
+        shared = PreviewRenderer()
+
+        def op(i):
+            renderer = shared if warm else PreviewRenderer()
+            # Warm renders pan a crop box around, as a user dragging would
+            box = (i % 512, i % 256, 2400 + i % 512, 1600 + i % 256) if warm else None
+            return renderer.render(image, 1280, 720, box=box)
+        return op
+    return setup
+
+
+def _encode(layout):
+    def setup(options, stack):
+        from example1.payload import prepare_image
+
+        image = _desktop_image(layout)
+        return lambda i: prepare_image(image)
+    return setup
+
+
+def _trim(options, stack):
+    from example1.trim import trim_image
+
+    image = _desktop_image("4k")
+    return lambda i: trim_image(image)
+
+
+def _analyze(stream):
+    def setup(options, stack):
+        from benchmarks.fake_anthropic import FakeAnthropicServer
+        from example1.chat_manager import ChatManager
+        from example1.transport import Transport
+
+        server = stack.enter_context(FakeAnthropicServer(latency=options.latency))
+        transport = Transport("test", base_url=server.base_url)
+        stack.callback(transport.close)
+        chat = ChatManager(cache=False, transport=transport)
+        image = _desktop_image("1080p")
+        if stream:
+            return lambda i: "".join(chat.stream_analysis(image, "Describe this"))
+        return lambda i: chat.analyze_image(image, "Describe this")
+    return setup
+
+
+def _analyze_wide(tiled):
+    def setup(options, stack):
+        from benchmarks.fake_anthropic import FakeAnthropicServer
+        from example1.chat_manager import ChatManager
+        from example1.transport import Transport
+
+        server = stack.enter_context(FakeAnthropicServer(latency=options.latency))
+        transport = Transport("test", base_url=server.base_url)
+        stack.callback(transport.close)
+        chat = ChatManager(cache=False, transport=transport)
+        # Three monitors: one downsampled request, or every tile at once
+        image = _desktop_image("multi")
+        if tiled:
+            return lambda i: chat.analyze_tiled(image, "Describe this")
+        return lambda i: chat.analyze(image, "Describe this")
+    return setup
+
+
+STAGES = {
+    "capture.1080p": _capture("1080p"),
+    "capture.4k": _capture("4k"),
+    "capture.multi": _capture("multi"),
+    "capture.region": _capture("multi", region=(1800, 400, 1280, 720)),
+    "history.capture": _history,
+    "history.page_in": _page_in,
+    "crop.view": _crop_view,
+    "crop.image": _crop_image,
+    "preview.cold": _preview(warm=False),
+    "preview.pan": _preview(warm=True),
+    "encode.1080p": _encode("1080p"),
+    "encode.4k": _encode("4k"),
+    "trim.4k": _trim,
+    "analyze": _analyze(stream=False),
+    "analyze.stream": _analyze(stream=True),
+    "analyze.wide": _analyze_wide(tiled=False),
+    "analyze.tiled": _analyze_wide(tiled=True),
+}
+
+
+def _peak_rss():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _run_stage(name, options, results):
+    from example1 import tracing
+
+    with contextlib.ExitStack() as stack:
+        op = STAGES[name](options, stack)
+        for i in range(options.warmup):
+            op(i)
+        tracing.reset()
+        timings = tracing.Histogram(size=options.repeat)
+        start = time.perf_counter()
+        for i in range(options.repeat):
+            t = time.perf_counter()
+            op(i)
+            timings.record(time.perf_counter() - t)
+        elapsed = time.perf_counter() - start
+        summary = timings.summary()
+        results.put({
+            "stage": name,
+            "ops_per_s": options.repeat / elapsed,
+            "p50_ms": summary["p50"] * 1000,
+            "p95_ms": summary["p95"] * 1000,
+            "p99_ms": summary["p99"] * 1000,
+            "peak_rss_mib": _peak_rss() / 2**20,
+            # Per-span medians from the instrumented code, for drilling in
+            "spans_p50_ms": {span: s["p50"] * 1000 for span, s in tracing.snapshot().items()},
+        })
+
+
+def run_stages(names, options):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    for name in names:
+        proc = ctx.Process(target=_run_stage, args=(name, options, results))
+        proc.start()
+        try:
+            yield results.get(timeout=options.timeout)
+        finally:
+            proc.join()
+
+
+def compare(result, baseline, tolerance, rss_tolerance):
+    """Regression messages for one stage result against its baseline entry"""
+    problems = []
+    if baseline is None:
+        return problems
+    old, new = baseline["p50_ms"], result["p50_ms"]
+    if new > old * (1 + tolerance) and new - old > MIN_DELTA_MS:
+        problems.append(f"median {old:.2f} -> {new:.2f} ms (+{(new / old - 1) * 100:.0f}%)")
+    old, new = baseline["peak_rss_mib"], result["peak_rss_mib"]
+    if new > old * (1 + rss_tolerance) and new - old > MIN_DELTA_MIB:
+        problems.append(f"peak RSS {old:.1f} -> {new:.1f} MiB (+{(new / old - 1) * 100:.0f}%)")
+    return problems
+
+
+def _machine():
+    return {"python": platform.python_version(), "machine": platform.machine(),
+            "system": platform.system(), "cpus": os.cpu_count()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stage", action="append", default=[],
+                        help="run only stages starting with this prefix (repeatable)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake API latency in seconds")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds to wait for one stage")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed median slowdown (0.25 = 25%%)")
+    parser.add_argument("--rss-tolerance", type=float, default=0.15, help="allowed peak RSS growth")
+    parser.add_argument("--update-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--json", metavar="PATH", help="also write the raw results here")
+    args = parser.parse_args(argv)
+
+    names = [name for name in STAGES if not args.stage or name.startswith(tuple(args.stage))]
+    if not names:
+        parser.error(f"no stage matches {args.stage}; stages are: {', '.join(STAGES)}")
+
+    baseline = {}
+    if not args.update_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            recorded = json.load(f)
+        baseline = recorded["stages"]
+        if recorded.get("machine") != _machine():
+            print(f"note: baseline was recorded on {recorded.get('machine')}, this is {_machine()}")
+
+    print(f"{'stage':<16} {'ops/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'RSS MiB':>9}  vs baseline")
+    results, regressions = [], []
+    for result in run_stages(names, args):
+        results.append(result)
+        entry = baseline.get(result["stage"])
+        problems = compare(result, entry, args.tolerance, args.rss_tolerance)
+        regressions += [f"{result['stage']}: {problem}" for problem in problems]
+        if entry is None:
+            verdict = "-" if args.update_baseline else "no baseline"
+        else:
+            verdict = "REGRESSED" if problems else f"{(result['p50_ms'] / entry['p50_ms'] - 1) * 100:+.0f}%"
+        print(f"{result['stage']:<16} {result['ops_per_s']:>9.1f} {result['p50_ms']:>9.2f} "
+              f"{result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['peak_rss_mib']:>9.1f}  {verdict}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"machine": _machine(), "stages": {r["stage"]: r for r in results}}, f, indent=2)
+    if args.update_baseline:
+        stages = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                stages = json.load(f)["stages"]
+        stages.update({r["stage"]: {key: round(r[key], 3) for key in ("ops_per_s", "p50_ms", "p95_ms", "peak_rss_mib")}
+                       for r in results})
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"machine": _machine(), "stages": stages}, f, indent=2)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if regressions:
+        print(f"\nPERFORMANCE REGRESSION in {len(regressions)} check(s) "
+              f"(tolerance {args.tolerance:.0%} time, {args.rss_tolerance:.0%} RSS):", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""Compare ChatManager latency with and without hedged requests.
+
+    python -m benchmarks.transport_bench --requests 100 --tail-rate 0.05 --hedge-after 0.2
+
+The fake API answers in --latency seconds, except a --tail-rate fraction of
+requests that take --tail-latency; --failure-rate injects retryable errors.
+"""
+import argparse
+
+from PIL import Image
+
+from benchmarks.fake_anthropic import FakeAnthropicServer
+from example1.chat_manager import ChatManager
+from example1.transport import Transport
+
+
+def _run(args, hedge_after):
+    image = Image.new("RGB", (800, 600), "white")
+    with FakeAnthropicServer(latency=args.latency, jitter=args.latency / 2, failure_rate=args.failure_rate,
+                             tail_rate=args.tail_rate, tail_latency=args.tail_latency) as server:
+        transport = Transport("test", base_url=server.base_url, hedge_after=hedge_after)
+        chat = ChatManager(cache=False, transport=transport)
+        results = [chat.analyze(image, f"Question {i}") for i in range(args.requests)]
+        transport.close()
+        latencies = sorted(r.latency for r in results)
+        pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+        label = "off" if hedge_after is None else f"{hedge_after:g}s"
+        print(f"{label:>6} {pick(0.5):>8.0f} {pick(0.95):>8.0f} {pick(0.99):>8.0f} "
+              f"{sum(not r.ok for r in results):>7} {server.requests:>9} {transport.hedges:>7} {server.connections:>6}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--tail-rate", type=float, default=0.05)
+    parser.add_argument("--tail-latency", type=float, default=2.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--hedge-after", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    print(f"{'hedge':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'failed':>7} {'requests':>9} "
+          f"{'hedges':>7} {'conns':>6}")
+    for hedge_after in (None, args.hedge_after):
+        _run(args, hedge_after)
+
+
+if __name__ == "__main__":
+    main()
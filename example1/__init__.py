@@ -1,4 +1,11 @@
-from .screenshot_manager import ScreenshotManager
-from .ui import ScreenshotUI
-
 __all__ = ['ScreenshotManager', 'ScreenshotUI']
+
+def __getattr__(name):
+    # Imported on first use so headless entry points (the CLI) never load Tk
+    if name == 'ScreenshotManager':
+        from .screenshot_manager import ScreenshotManager
+        return ScreenshotManager
+    if name == 'ScreenshotUI':
+        from .ui import ScreenshotUI
+        return ScreenshotUI
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
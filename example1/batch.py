@@ -0,0 +1,182 @@
+from dataclasses import dataclass
+import anthropic
+import asyncio
+import inspect
+import logging
+import os
+import time
+from dotenv import load_dotenv
+from .chat_manager import ChatManager
+from .payload import ImagePayload, prepare_image
+from .transport import backoff_delay, is_retryable
+
+@dataclass
+class BatchResult:
+    """Outcome of one image in a batch; exactly one of text/error is set"""
+    index: int
+    text: str = None
+    error: str = None
+    attempts: int = 0
+    latency: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    
+    @property
+    def ok(self):
+        return self.error is None
+
+class AsyncRateLimiter:
+    """Token bucket refilled continuously at per_minute / 60 units per second"""
+    
+    def __init__(self, per_minute, burst=None):
+        self.rate = per_minute / 60.0
+        # Default burst: ten seconds' worth, and at least one unit
+        self.capacity = float(burst) if burst else max(1.0, self.rate * 10)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    async def acquire(self, amount=1):
+        """Wait until amount units are available and take them"""
+        # A single request bigger than the bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+    
+    def adjust(self, amount):
+        """Give back (positive) or charge (negative) units after the fact"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+def estimate_input_tokens(payload, prompt):
+    """Rough input-token cost of one request (Anthropic: ~w*h/750 per image)"""
+    return int(payload.width * payload.height / 750) + len(prompt) // 4 + 16
+
+class BatchAnalyzer:
+    """Analyze many images concurrently on the async Anthropic client
+    
+    At most concurrency requests are in flight. Requests and estimated input
+    tokens are rate limited client-side so a large batch stays under the
+    account's limits instead of bouncing off 429s. Transient failures are
+    retried with jittered exponential backoff.
+    
+        analyzer = BatchAnalyzer(concurrency=8)
+        async for result in analyzer.analyze_many(images, "Transcribe the text"):
+            print(result.index, result.text or result.error)
+    
+    base_url points the client at another endpoint, e.g. a local fake server.
+    """
+    
+    def __init__(self, api_key=None, concurrency=8, requests_per_minute=50,
+                 tokens_per_minute=40000, max_retries=5, base_url=None,
+                 model=ChatManager.MODEL, max_tokens=ChatManager.MAX_TOKENS, client=None):
+        if client is None:
+            if api_key is None:
+                load_dotenv()
+                api_key = os.getenv('ANTHROPIC_API_KEY')
+            # Retries are handled here so they share the rate limiter
+            client = anthropic.AsyncAnthropic(api_key=api_key, base_url=base_url, max_retries=0)
+        self.client = client
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.model = model
+        self.max_tokens = max_tokens
+        self.request_limiter = AsyncRateLimiter(requests_per_minute)
+        self.token_limiter = AsyncRateLimiter(tokens_per_minute)
+    
+    async def analyze_many(self, items, prompt=None):
+        """Yield a BatchResult per item, in completion order
+        
+        items may be PIL images, already prepared ImagePayloads, or awaitables
+        resolving to either (e.g. futures from a decode pool), and may be a
+        lazy iterable; only a window of concurrency items is held at once.
+        """
+        message = prompt if prompt else ChatManager.DEFAULT_PROMPT
+        items = enumerate(items)
+        pending = set()
+        
+        def launch():
+            for index, item in items:
+                pending.add(asyncio.create_task(self._analyze_one(index, item, message)))
+                if len(pending) >= self.concurrency:
+                    return
+        
+        launch()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                pending.difference_update(done)
+                for task in done:
+                    yield task.result()
+                launch()
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def analyze_all(self, items, prompt=None):
+        """Run a whole batch and return the results in input order"""
+        results = [result async for result in self.analyze_many(items, prompt)]
+        return sorted(results, key=lambda result: result.index)
+    
+    async def close(self):
+        await self.client.close()
+    
+    async def _analyze_one(self, index, item, message):
+        start = time.perf_counter()
+        result = BatchResult(index=index)
+        try:
+            payload = await item if inspect.isawaitable(item) else item
+            if not isinstance(payload, ImagePayload):
+                # Encoding is CPU-bound; keep it off the event loop
+                payload = await asyncio.to_thread(prepare_image, payload)
+        except Exception as e:
+            logging.error(f"Could not prepare image {index}: {e}", exc_info=True)
+            result.error = f"Error preparing image: {e}"
+            return result
+        
+        estimate = estimate_input_tokens(payload, message)
+        request = {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "messages": [{
+                "role": "user",
+                "content": [{"type": "text", "text": message}, payload.to_block()],
+            }],
+        }
+        
+        while True:
+            result.attempts += 1
+            await self.request_limiter.acquire()
+            await self.token_limiter.acquire(estimate)
+            try:
+                response = await self.client.messages.create(**request)
+            except Exception as e:
+                if result.attempts <= self.max_retries and is_retryable(e):
+                    delay = backoff_delay(result.attempts - 1, error=e)
+                    logging.warning(f"Image {index} attempt {result.attempts} failed ({e}); "
+                                    f"retrying in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                logging.error(f"Error analyzing image {index}: {e}")
+                result.error = f"Error analyzing image: {e}"
+                break
+            
+            result.text = response.content[0].text
+            result.input_tokens = response.usage.input_tokens
+            result.output_tokens = response.usage.output_tokens
+            # Correct the bucket with what the request really cost
+            self.token_limiter.adjust(estimate - result.input_tokens)
+            break
+        
+        result.latency = time.perf_counter() - start
+        return result
@@ -0,0 +1,54 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import logging
+import mss
+
+class CaptureSession:
+    """Long-lived mss handle for low-latency captures
+    
+    mss handles are tied to the thread that opened them (X11 display
+    connection, GDI device context), so the handle lives on one dedicated
+    worker thread and every grab is handed to it. Opening the handle once
+    saves the per-capture connect/teardown cost.
+    """
+    
+    def __init__(self, backend=mss.mss):
+        self._backend = backend
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="capture-session",
+                                            initializer=self._open)
+        # Start the thread and open the handle now rather than on first grab
+        self._monitors = self._executor.submit(self._read_monitors).result()
+        logging.info("Capture session ready with %d monitor(s)", len(self._monitors) - 1)
+    
+    def _open(self):
+        self._local.sct = self._backend()
+    
+    def _read_monitors(self):
+        return [dict(m) for m in self._local.sct.monitors]
+    
+    @property
+    def monitors(self):
+        """mss monitor list: index 0 is the virtual desktop, 1..N physical screens"""
+        return self._monitors
+    
+    def refresh_monitors(self):
+        """Re-read the monitor layout after screens are added or removed"""
+        self._monitors = self._executor.submit(self._read_monitors).result()
+        return self._monitors
+    
+    def grab(self, area):
+        """Grab an mss area dict on the session thread and return the ScreenShot"""
+        return self._executor.submit(lambda: self._local.sct.grab(area)).result()
+    
+    def close(self):
+        """Release the mss handle and stop the worker thread"""
+        def _close():
+            sct = getattr(self._local, "sct", None)
+            if sct is not None:
+                sct.close()
+        try:
+            self._executor.submit(_close).result()
+        except RuntimeError:
+            pass  # Already shut down
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,98 @@
+"""Append-only on-disk chat history
+
+One JSON object per line ({"role": ..., "text": ..., "time": ...}), never
+rewritten. Only the byte offset of each line is kept in memory, so any
+range of messages can be read back with a seek, however long the history.
+"""
+from array import array
+import json
+import logging
+import os
+import threading
+import time
+
+DEFAULT_CHAT_LOG_PATH = os.path.join(".cache", "chat.jsonl")
+# Bytes read at a time while indexing an existing log
+INDEX_CHUNK = 1 << 20
+
+class ChatLog:
+    def __init__(self, path=DEFAULT_CHAT_LOG_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a+b")
+        self._lock = threading.Lock()
+        # Start offset of every complete line; built on first use
+        self._offsets = None
+        self._end = 0
+    
+    def _index(self):
+        """Find the start of every complete line (called with the lock held)"""
+        if self._offsets is not None:
+            return self._offsets
+        offsets = array("q")
+        self._file.seek(0)
+        position = 0
+        line_start = 0
+        while True:
+            chunk = self._file.read(INDEX_CHUNK)
+            if not chunk:
+                break
+            newline = chunk.find(b"\n")
+            while newline != -1:
+                offsets.append(line_start)
+                line_start = position + newline + 1
+                newline = chunk.find(b"\n", newline + 1)
+            position += len(chunk)
+        if line_start < position:
+            # A write cut short by a crash; the next append starts a new line
+            logging.warning(f"Ignoring {position - line_start} bytes of incomplete line at the end of {self.path}")
+            self._file.write(b"\n")
+            position += 1
+        self._offsets = offsets
+        self._end = position
+        return offsets
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._index())
+    
+    def append(self, role, text):
+        """Add a message and return its index"""
+        line = json.dumps({"role": role, "text": text, "time": time.time()}, ensure_ascii=False).encode() + b"\n"
+        with self._lock:
+            offsets = self._index()
+            self._file.write(line)
+            self._file.flush()
+            offsets.append(self._end)
+            self._end += len(line)
+            return len(offsets) - 1
+    
+    def read(self, start, stop):
+        """Messages start..stop-1 as dicts (clamped to the log)"""
+        with self._lock:
+            offsets = self._index()
+            start = max(0, start)
+            stop = min(stop, len(offsets))
+            if start >= stop:
+                return []
+            self._file.seek(offsets[start])
+            lines = [self._file.readline() for _ in range(stop - start)]
+        messages = []
+        for line in lines:
+            try:
+                messages.append(json.loads(line))
+            except ValueError:
+                messages.append({"role": "status", "text": "(unreadable message)", "time": None})
+        return messages
+    
+    def tail(self, count):
+        """The last count messages and the index of the first of them"""
+        with self._lock:
+            start = max(0, len(self._index()) - count)
+        return start, self.read(start, start + count)
+    
+    def close(self):
+        with self._lock:
+            self._file.close()
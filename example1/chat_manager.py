@@ -1,76 +1,123 @@
-import anthropic
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 import logging
-from PIL import Image
-import io
-import base64
 import os
+import time
 from dotenv import load_dotenv
+from . import tracing
+from .payload import prepare_image
+from .response_cache import ResponseCache
+from .tiling import TILE_OVERLAP, TILE_SIZE, merge_answers, tile_grid, tile_prompt
+from .transport import NotConfigured, Transport, TransportError
 
-# Configure detailed logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# Persistent response cache, next to the screenshots directory
+DEFAULT_CACHE_PATH = os.path.join(".cache", "responses.sqlite3")
+# Squares a screenshot may differ in and still reuse an answer (a blinking cursor)
+DEFAULT_FUZZY_DISTANCE = 1
+
+SUMMARY_PROMPT = ("Summarize this conversation about a screenshot for your own later reference. "
+                  "Keep every concrete detail a later question could need: names, numbers, "
+                  "error messages, file names and what was already answered.\n\n")
+
+def estimate_tokens(text):
+    """Rough token count of English text, at about four characters a token"""
+    return len(text) // 4 + 1
+
+class NoScreenshot(Exception):
+    """A follow-up question before any screenshot was analyzed"""
+
+@dataclass
+class AnalysisResult:
+    """Outcome of analyze(); exactly one of text/error is set"""
+    text: str = None
+    # A TransportError subclass, or another exception for local failures
+    error: Exception = None
+    attempts: int = 0
+    latency: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached: bool = False
+    hedged: bool = False
+    
+    @property
+    def ok(self):
+        return self.error is None
 
 class ChatManager:
-    def __init__(self):
+    MODEL = "claude-3-opus-20240229"
+    MAX_TOKENS = 1024
+    DEFAULT_PROMPT = "What can you see in this screenshot? Please describe its content."
+    # Transport settings: per-attempt timeout, overall deadline per call,
+    # retries for transient failures, and hedging (None = off)
+    REQUEST_TIMEOUT = 60.0
+    REQUEST_DEADLINE = 180.0
+    MAX_RETRIES = 3
+    HEDGE_AFTER = None
+    # Follow-up turns are resent with every question; past this many
+    # (estimated) tokens the older ones are folded into a summary, keeping
+    # the opening question and up to KEEP_RECENT_TURNS recent turns verbatim.
+    # The summary is written in the background after an answer and used
+    # from the next question on
+    HISTORY_TOKEN_BUDGET = 6000
+    KEEP_RECENT_TURNS = 4
+    SUMMARY_MAX_TOKENS = 400
+    # Messages kept in get_chat_history(); the store keeps every analysis
+    MAX_MESSAGES = 200
+    
+    def __init__(self, cache=True, store=None, auto_trim=False, transport=None):
+        """cache: True for the default on-disk cache, False to disable, or a ResponseCache
+        
+        store: optional ScreenshotStore that records every answered question
+        auto_trim: cut uniform borders and empty margins off images before upload
+        transport: a Transport to use instead of the shared one for the env API key
+        """
         self.client = None
-        self.messages = []
+        self.transport = None
+        self.messages = deque(maxlen=self.MAX_MESSAGES)
+        self.store = store
+        self.auto_trim = auto_trim
+        # Turns about current_image, resent with every follow-up question
+        self.current_image = None
+        self.conversation = []
+        self._image_block = None
+        # Summary being written: (conversation, turns it replaces, future)
+        self._compaction = None
+        self._compactor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="compact")
+        if cache is True:
+            cache = ResponseCache(path=DEFAULT_CACHE_PATH, fuzzy_distance=DEFAULT_FUZZY_DISTANCE)
+        self.cache = cache or None
+        # Last encoded image; its bytes_saved reports the upload savings
+        self.last_payload = None
         logging.debug("Initializing ChatManager")
-        self._initialize_from_env()
+        if transport is not None:
+            self.transport = transport
+            self.client = transport.client
+        else:
+            self._initialize_from_env()
         
     def _initialize_from_env(self):
         """Initialize client from environment variable"""
-        try:
-            print("\n=== Environment Initialization ===")
-            # Load environment variables
-            load_dotenv()
-            api_key = os.getenv('ANTHROPIC_API_KEY')
-            print(f"API Key found: {'Yes' if api_key else 'No'}")
-            print(f"API Key length: {len(api_key) if api_key else 0}")
-            print(f"API Key starts with: {api_key[:10] + '...' if api_key else 'None'}")
-            
-            if not api_key:
-                print("No API key found in environment")
-                return False
-            
-            print("\nTrying to initialize Anthropic client...")
-            print(f"Anthropic version: {anthropic.__version__}")
-            
-            # Initialize client according to latest SDK docs
-            self.client = anthropic.Anthropic(
-                api_key=api_key,
-            )
-            print("Client initialized successfully!")
-            return True
-            
-        except Exception as e:
-            print(f"\nERROR during initialization: {str(e)}")
-            print(f"Error type: {type(e)}")
-            import traceback
-            print("Traceback:")
-            traceback.print_exc()
+        # Load environment variables
+        load_dotenv()
+        api_key = os.getenv('ANTHROPIC_API_KEY')
+        if not api_key:
+            logging.info("No API key found in environment")
             return False
+        return self.initialize(api_key)
     
     def initialize(self, api_key):
         """Initialize the Anthropic client with explicit API key"""
         try:
-            print("\n=== Manual Initialization ===")
-            print(f"Received API key length: {len(api_key)}")
-            print(f"API key starts with: {api_key[:10]}...")
-            
-            # Initialize client
-            self.client = anthropic.Anthropic(
-                api_key=api_key,
-            )
-            print("Client initialized successfully!")
+            # Shared with every other ChatManager using this key
+            self.transport = Transport.shared(api_key, timeout=self.REQUEST_TIMEOUT,
+                                              deadline=self.REQUEST_DEADLINE, max_retries=self.MAX_RETRIES,
+                                              hedge_after=self.HEDGE_AFTER)
+            self.client = self.transport.client
+            logging.debug("Anthropic client initialized")
             return True
         except Exception as e:
-            print(f"\nERROR during manual initialization: {str(e)}")
-            print(f"Error type: {type(e)}")
-            import traceback
-            print("Traceback:")
-            traceback.print_exc()
+            logging.error(f"Could not initialize the Anthropic client: {e}", exc_info=True)
             return False
     
     def is_initialized(self):
@@ -86,61 +133,410 @@ class ChatManager:
             return False
     
     def analyze_image(self, image, prompt=None):
-        """Analyze image with Claude"""
+        """Analyze image with Claude, starting a new conversation about it"""
+        result = self.analyze(image, prompt)
+        if result.ok:
+            return result.text
+        if isinstance(result.error, NotConfigured):
+            return "Error: Please configure API key first"
+        return f"Error analyzing image: {str(result.error)}"
+    
+    def analyze(self, image, prompt=None, deadline=None):
+        """Like analyze_image, but returns an AnalysisResult with a typed error
+        
+        deadline overrides REQUEST_DEADLINE (seconds, retries included).
+        """
         if not self.client:
             logging.error("Client not initialized. Please provide API key first.")
-            return "Error: Please configure API key first"
-            
+            return AnalysisResult(error=NotConfigured("Please configure API key first"))
+        
+        start = time.perf_counter()
         try:
-            logging.debug("Converting image to base64")
-            # Convert PIL Image to base64
-            buffered = io.BytesIO()
-            image.save(buffered, format="PNG")
-            img_str = base64.b64encode(buffered.getvalue()).decode()
-            
-            # Prepare the message
-            default_prompt = "What can you see in this screenshot? Please describe its content."
-            message = prompt if prompt else default_prompt
-            logging.debug(f"Using prompt: {message}")
+            with tracing.profile_once("analyze_image"), tracing.span("analysis.total"):
+                # Prepare the message
+                message = prompt if prompt else self.DEFAULT_PROMPT
+                logging.debug("Using prompt: %s", message)
+                self._start_conversation(image)
+                
+                cached = self._cached_response(image, message)
+                if cached is not None:
+                    return AnalysisResult(text=cached, cached=True, latency=time.perf_counter() - start)
+                
+                # Create the message with image using Claude 3
+                logging.debug("Sending request to Claude")
+                call = self._complete(message, deadline)
+                if self.cache is not None:
+                    self.cache.put(image, message, self.MODEL, call.text)
+                usage = call.message.usage
+                return AnalysisResult(text=call.text, attempts=call.attempts, latency=time.perf_counter() - start,
+                                      input_tokens=usage.input_tokens, output_tokens=usage.output_tokens,
+                                      hedged=call.hedged)
             
-            # Create the message with image using Claude 3
-            logging.debug("Sending request to Claude")
-            response = self.client.messages.create(
-                model="claude-3-opus-20240229",
-                max_tokens=1024,
-                messages=[{
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": message},
-                        {
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": "image/png",
-                                "data": img_str
-                            }
-                        }
-                    ]
-                }]
+        except TransportError as e:
+            logging.error(f"Error analyzing image: {type(e).__name__}: {e}")
+            return AnalysisResult(error=e, attempts=e.attempts, latency=time.perf_counter() - start)
+        except Exception as e:
+            logging.error(f"Error analyzing image: {str(e)}", exc_info=True)
+            return AnalysisResult(error=e, latency=time.perf_counter() - start)
+    
+    def analyze_tiled(self, image, prompt=None, max_workers=None, tile_size=TILE_SIZE, overlap=TILE_OVERLAP):
+        """Analyze a large image as overlapping full-resolution tiles; returns an AnalysisResult
+        
+        Images the model would downsample (wide multi-monitor captures) are
+        split with tiling.tile_grid and the tiles are sent at once, so small
+        text stays legible and the whole grid takes about as long as one
+        request. max_workers caps the requests in flight; by default it is
+        the transport's connection limit, and 429s beyond the account's rate
+        limit are retried by the transport. The answers are merged into one
+        response with each tile's position and pixel box. Follow-up
+        questions then refer to the whole image. Images that fit in one
+        tile go through analyze.
+        """
+        if not self.client:
+            logging.error("Client not initialized. Please provide API key first.")
+            return AnalysisResult(error=NotConfigured("Please configure API key first"))
+        
+        grid = tile_grid(image.width, image.height, tile_size, overlap)
+        if len(grid) == 1:
+            return self.analyze(image, prompt)
+        
+        start = time.perf_counter()
+        try:
+            with tracing.span("analysis.tiled"):
+                message = prompt if prompt else self.DEFAULT_PROMPT
+                self._start_conversation(image)
+                cache_key = f"[tiled {tile_size}/{overlap}] {message}"
+                cached = self._cached_response(image, message, key=cache_key)
+                if cached is not None:
+                    return AnalysisResult(text=cached, cached=True, latency=time.perf_counter() - start)
+                
+                logging.info("Analyzing %dx%d image as %d tiles", image.width, image.height, len(grid))
+                workers = min(len(grid), max_workers or self.transport.max_connections)
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tile") as pool:
+                    results = list(pool.map(
+                        lambda tile: self._analyze_tile(image, tile, tile_prompt(message, tile, grid, image.size)),
+                        grid))
+                attempts = sum(result.attempts for result in results)
+                if not any(result.ok for result in results):
+                    return AnalysisResult(error=results[0].error, attempts=attempts,
+                                          latency=time.perf_counter() - start)
+                
+                answers = [result.text if result.ok else f"(not analyzed: {result.error})" for result in results]
+                text = merge_answers(grid, answers, image.size)
+                self._record_exchange(message, text)
+                if self.cache is not None and all(result.ok for result in results):
+                    self.cache.put(image, cache_key, self.MODEL, text)
+                return AnalysisResult(text=text, attempts=attempts, latency=time.perf_counter() - start,
+                                      input_tokens=sum(result.input_tokens for result in results),
+                                      output_tokens=sum(result.output_tokens for result in results),
+                                      hedged=any(result.hedged for result in results))
+        
+        except Exception as e:
+            logging.error(f"Error analyzing image: {str(e)}", exc_info=True)
+            return AnalysisResult(error=e, latency=time.perf_counter() - start)
+    
+    def _analyze_tile(self, image, tile, message):
+        """One standalone request about a tile, as an AnalysisResult"""
+        start = time.perf_counter()
+        try:
+            with tracing.span("tile.prepare"):
+                payload = prepare_image(image.crop(tile.box))
+            with tracing.span("tile.request"):
+                call = self.transport.send(
+                    model=self.MODEL,
+                    max_tokens=self.MAX_TOKENS,
+                    messages=[{"role": "user", "content": [payload.to_block(), {"type": "text", "text": message}]}]
+                )
+            usage = call.message.usage
+            self._log_usage(usage)
+            return AnalysisResult(text=call.text, attempts=call.attempts, latency=time.perf_counter() - start,
+                                  input_tokens=usage.input_tokens, output_tokens=usage.output_tokens,
+                                  hedged=call.hedged)
+        except TransportError as e:
+            logging.error(f"Error analyzing {tile.label}: {type(e).__name__}: {e}")
+            return AnalysisResult(error=e, attempts=e.attempts, latency=time.perf_counter() - start)
+        except Exception as e:
+            logging.error(f"Error analyzing {tile.label}: {e}", exc_info=True)
+            return AnalysisResult(error=e, latency=time.perf_counter() - start)
+    
+    def ask(self, question, deadline=None):
+        """Ask a follow-up question about the current screenshot; returns an AnalysisResult"""
+        if not self.client:
+            logging.error("Client not initialized. Please provide API key first.")
+            return AnalysisResult(error=NotConfigured("Please configure API key first"))
+        if self.current_image is None:
+            return AnalysisResult(error=NoScreenshot("Analyze a screenshot first"))
+        
+        start = time.perf_counter()
+        try:
+            logging.debug("Follow-up question: %s", question)
+            with tracing.span("followup.total"):
+                call = self._complete(question, deadline)
+            usage = call.message.usage
+            return AnalysisResult(text=call.text, attempts=call.attempts, latency=time.perf_counter() - start,
+                                  input_tokens=usage.input_tokens, output_tokens=usage.output_tokens,
+                                  hedged=call.hedged)
+        except TransportError as e:
+            logging.error(f"Error asking follow-up: {type(e).__name__}: {e}")
+            return AnalysisResult(error=e, attempts=e.attempts, latency=time.perf_counter() - start)
+        except Exception as e:
+            logging.error(f"Error asking follow-up: {str(e)}", exc_info=True)
+            return AnalysisResult(error=e, latency=time.perf_counter() - start)
+    
+    def stream_analysis(self, image, prompt=None):
+        """Analyze image with Claude, yielding the response text as it arrives
+        
+        Yields text deltas; a cache hit yields the whole response at once.
+        Failures are raised: NotConfigured without an API key, another
+        TransportError subclass when the request fails.
+        """
+        if not self.client:
+            logging.error("Client not initialized. Please provide API key first.")
+            raise NotConfigured("Please configure API key first")
+        
+        try:
+            with tracing.profile_once("stream_analysis"), tracing.span("analysis.total"):
+                message = prompt if prompt else self.DEFAULT_PROMPT
+                logging.debug("Using prompt: %s", message)
+                self._start_conversation(image)
+                
+                cached = self._cached_response(image, message)
+                if cached is not None:
+                    yield cached
+                    return
+                
+                chunks = []
+                for text in self._stream_turn(message):
+                    chunks.append(text)
+                    yield text
+                if self.cache is not None:
+                    self.cache.put(image, message, self.MODEL, "".join(chunks))
+        
+        except TransportError as e:
+            logging.error(f"Error analyzing image: {type(e).__name__}: {e}")
+            raise
+        except Exception as e:
+            logging.error(f"Error analyzing image: {str(e)}", exc_info=True)
+            raise
+    
+    def stream_followup(self, question):
+        """Like ask(), yielding the answer text as it arrives
+        
+        Failures are raised as in stream_analysis; NoScreenshot if there is
+        no screenshot to ask about.
+        """
+        if not self.client:
+            logging.error("Client not initialized. Please provide API key first.")
+            raise NotConfigured("Please configure API key first")
+        if self.current_image is None:
+            raise NoScreenshot("Analyze a screenshot first")
+        
+        try:
+            logging.debug("Follow-up question: %s", question)
+            with tracing.span("followup.total"):
+                yield from self._stream_turn(question)
+        except TransportError as e:
+            logging.error(f"Error asking follow-up: {type(e).__name__}: {e}")
+            raise
+        except Exception as e:
+            logging.error(f"Error asking follow-up: {str(e)}", exc_info=True)
+            raise
+    
+    def _start_conversation(self, image):
+        """Make image the subject of a fresh conversation"""
+        self.current_image = image
+        self.conversation = []
+        self._image_block = None
+        self._compaction = None
+    
+    def _cached_response(self, image, message, key=None):
+        """Serve an opening question from the response cache, if possible
+        
+        key replaces message as the cache key, for answers to the same
+        question that were produced differently (e.g. tiled).
+        """
+        if self.cache is None:
+            return None
+        with tracing.span("cache.lookup"):
+            cached = self.cache.get(image, key or message, self.MODEL)
+        if cached is not None:
+            logging.info("Returning cached analysis")
+            self._record_exchange(message, cached)
+        return cached
+    
+    def _complete(self, message, deadline=None):
+        """Send the conversation plus message, record the reply and return the transport Call"""
+        messages = self._api_messages(message)
+        with tracing.span("api.request"):
+            call = self.transport.send(
+                deadline=deadline,
+                model=self.MODEL,
+                max_tokens=self.MAX_TOKENS,
+                messages=messages
             )
-            logging.debug("Successfully received response from Claude")
-            
-            # Store the conversation
-            self.messages.append({
+        logging.debug("Received response from Claude after %d attempt(s)", call.attempts)
+        self._log_usage(call.message.usage)
+        self._record_exchange(message, call.text)
+        self._schedule_compaction()
+        return call
+    
+    def _stream_turn(self, message):
+        """Stream the reply to message, recording it once complete"""
+        messages = self._api_messages(message)
+        logging.debug("Streaming request to Claude")
+        start = time.perf_counter()
+        chunks = []
+        with self.transport.stream(
+            model=self.MODEL,
+            max_tokens=self.MAX_TOKENS,
+            messages=messages
+        ) as stream:
+            for text in stream.text_stream:
+                if not chunks:
+                    first_token = time.perf_counter() - start
+                    tracing.record("api.first_token", first_token)
+                    logging.info("First token after %.0f ms", first_token * 1000)
+                chunks.append(text)
+                yield text
+            self._log_usage(stream.get_final_message().usage)
+        tracing.record("api.stream", time.perf_counter() - start)
+        logging.debug("Stream from Claude finished")
+        self._record_exchange(message, "".join(chunks))
+        self._schedule_compaction()
+    
+    def _api_messages(self, message):
+        """The conversation so far plus message, with the image in the first turn"""
+        self._apply_compaction()
+        turns = self.conversation + [{"role": "user", "content": message}]
+        messages = []
+        for i, turn in enumerate(turns):
+            content = turn["content"]
+            if i == 0:
+                content = [self._get_image_block(), {"type": "text", "text": content}]
+            messages.append({"role": turn["role"], "content": content})
+        return messages
+    
+    def conversation_tokens(self):
+        """Estimated text tokens of the conversation (the image not included)"""
+        return sum(estimate_tokens(turn["content"]) for turn in self.conversation)
+    
+    def _schedule_compaction(self):
+        """Start summarizing older turns once over HISTORY_TOKEN_BUDGET
+        
+        Runs on the compactor thread so the answer that pushed the
+        conversation over budget isn't held up; _apply_compaction swaps the
+        summary in before the next request. The opening question carries
+        the image and stays first, so the image prefix is still served from
+        the prompt cache; the summary replaces the turns after it as a
+        single assistant turn, so the roles still alternate.
+        """
+        if self._compaction is not None or self.conversation_tokens() <= self.HISTORY_TOKEN_BUDGET:
+            return
+        # Keep fewer recent turns if they alone would take over half the
+        # budget, so there is room to grow before the next compaction
+        keep = self.KEEP_RECENT_TURNS
+        turns = len(self.conversation)
+        while keep > 0 and sum(estimate_tokens(turn["content"]) for turn in self.conversation[turns - keep:]) \
+                > self.HISTORY_TOKEN_BUDGET // 2:
+            keep -= 2
+        if turns < keep + 2:
+            return
+        cut = turns - keep
+        future = self._compactor.submit(self._summarize, self.conversation[0], self.conversation[1:cut])
+        self._compaction = (self.conversation, cut, future)
+    
+    def _apply_compaction(self, wait=False):
+        """Replace the summarized turns with the summary, once it is ready
+        
+        Until then the full conversation is sent; wait blocks for it instead.
+        """
+        if self._compaction is None:
+            return
+        conversation, cut, future = self._compaction
+        if conversation is not self.conversation:
+            # A new screenshot started a new conversation meanwhile
+            self._compaction = None
+            return
+        if not wait and not future.done():
+            return
+        self._compaction = None
+        before = self.conversation_tokens()
+        summary = {"role": "assistant", "content": f"Summary of the conversation so far: {future.result()}"}
+        self.conversation = [self.conversation[0], summary] + self.conversation[cut:]
+        logging.info("Compacted %d turns: about %d tokens down to %d", cut - 1, before, self.conversation_tokens())
+    
+    def _summarize(self, first, old):
+        """Summary text of the given turns (compactor thread)
+        
+        Without an answer from the API the old turns are cut down to their
+        first lines instead.
+        """
+        transcript = "\n\n".join(f"{turn['role'].capitalize()}: {turn['content']}" for turn in [first] + old)
+        try:
+            with tracing.span("conversation.compact"):
+                response = self.transport.create(
+                    model=self.MODEL,
+                    max_tokens=self.SUMMARY_MAX_TOKENS,
+                    messages=[{"role": "user", "content": SUMMARY_PROMPT + transcript}]
+                )
+            self._log_usage(response.usage)
+            summary = "".join(block.text for block in response.content if block.type == "text")
+            if not summary:
+                raise ValueError("empty response")
+            return summary
+        except Exception as e:
+            logging.warning(f"Could not summarize the conversation, truncating it instead: {e}")
+            return "\n".join(f"{turn['role'].capitalize()}: {turn['content'][:200]}" for turn in old)
+    
+    def _get_image_block(self):
+        """Encode the conversation's image once and mark it for prompt caching
+        
+        The image goes first and carries the cache breakpoint, so follow-up
+        turns reuse the encoded block and the API reads the image prefix
+        from its prompt cache instead of processing it again.
+        """
+        if self._image_block is None:
+            logging.debug("Preparing image payload")
+            # Resize to what the model actually uses and pick the cheapest encoding
+            with tracing.span("payload.total"):
+                payload = prepare_image(self.current_image, trim=self.auto_trim)
+            self.last_payload = payload
+            self._image_block = payload.to_block()
+            self._image_block["cache_control"] = {"type": "ephemeral"}
+        return self._image_block
+    
+    def _log_usage(self, usage):
+        logging.info("Tokens: %d in, %d out, %d read from prompt cache, %d written to it",
+                     usage.input_tokens, usage.output_tokens,
+                     getattr(usage, 'cache_read_input_tokens', 0) or 0,
+                     getattr(usage, 'cache_creation_input_tokens', 0) or 0)
+    
+    def _record_exchange(self, message, response):
+        """Store the conversation"""
+        for history in (self.messages, self.conversation):
+            history.append({
                 "role": "user",
                 "content": message
             })
-            self.messages.append({
+            history.append({
                 "role": "assistant",
-                "content": response.content[0].text
+                "content": response
             })
-            
-            return response.content[0].text
-            
-        except Exception as e:
-            logging.error(f"Error analyzing image: {str(e)}", exc_info=True)
-            return f"Error analyzing image: {str(e)}"
+        if self.store is not None:
+            try:
+                self.store.add_analysis(self.current_image, message, self.MODEL, response)
+            except Exception as e:
+                logging.error(f"Could not record analysis in store: {e}", exc_info=True)
+    
+    def close(self):
+        """Stop the compaction thread, dropping any summary still pending
+        
+        A summary already being written finishes in the background; close
+        doesn't wait for it.
+        """
+        self._compaction = None
+        self._compactor.shutdown(wait=False, cancel_futures=True)
     
     def get_chat_history(self):
-        """Return the chat history"""
-        return self.messages 
\ No newline at end of file
+        """Return the last MAX_MESSAGES messages"""
+        return list(self.messages) 
\ No newline at end of file
@@ -0,0 +1,171 @@
+import tkinter as tk
+
+class ChatView:
+    """A tk.Text showing a bounded window of a ChatLog
+    
+    At most `window` messages are in the widget at once. Scrolling to the
+    top pages older messages in from the log (dropping the newest ones
+    beyond the window), and scrolling back down pages them in again, so
+    the widget stays the same size however long the history gets. New
+    messages are written to the log and shown at the end, which brings
+    the view back to the latest messages first.
+    
+    Messages in the widget are delimited by marks named after their index
+    in the log; each message is whole lines, so pages are spliced in by
+    line number.
+    """
+    
+    PREFIXES = {"user": "You: ", "assistant": "Claude: ", "status": ""}
+    
+    def __init__(self, text, scrollbar, log, window=200, page=50):
+        self.text = text
+        self.scrollbar = scrollbar
+        self.log = log
+        self.window = window
+        self.page = page
+        # Log indexes of the messages in the widget: first..end-1
+        self.first = 0
+        self.end = 0
+        # Role and text so far of a message being streamed in
+        self._live = None
+        self._paging = False
+        self.text.configure(yscrollcommand=self._on_scroll)
+    
+    def show_latest(self):
+        """Replace the widget's contents with the newest messages"""
+        start, messages = self.log.tail(self.page)
+        self._clear()
+        self.first = self.end = start
+        self._insert_end(messages)
+        self.text.see(tk.END)
+    
+    def add(self, role, text):
+        """Log a complete message and show it at the end"""
+        self._follow()
+        index = self.log.append(role, text)
+        self._insert_end([{"role": role, "text": text}], index)
+        self._trim_top()
+        self.text.see(tk.END)
+    
+    def begin(self, role):
+        """Start showing a message whose text arrives in pieces"""
+        self._follow()
+        self._live = (role, [])
+        self.text.mark_set("live", "end-1c")
+        self.text.mark_gravity("live", tk.LEFT)
+        self.text.insert(tk.END, "\n" + self.PREFIXES[role])
+        self.text.see(tk.END)
+    
+    def extend(self, text):
+        self._live[1].append(text)
+        self.text.insert(tk.END, text)
+        self.text.see(tk.END)
+    
+    def finish(self):
+        """Log the streamed message now that it is complete"""
+        role, chunks = self._live
+        self._live = None
+        self.text.insert(tk.END, "\n")
+        index = self.log.append(role, "".join(chunks))
+        self._set_mark(index, "live")
+        self.end = index + 1
+        self.text.mark_unset("live")
+        self._trim_top()
+        self.text.see(tk.END)
+    
+    def _render(self, message):
+        return f"\n{self.PREFIXES.get(message['role'], '')}{message['text']}\n"
+    
+    def _mark(self, index):
+        return f"msg{index}"
+    
+    def _set_mark(self, index, position):
+        self.text.mark_set(self._mark(index), position)
+        # Text appended after the message must not move its start
+        self.text.mark_gravity(self._mark(index), tk.LEFT)
+    
+    def _clear(self):
+        for index in range(self.first, self.end):
+            self.text.mark_unset(self._mark(index))
+        self.text.delete("1.0", tk.END)
+    
+    def _follow(self):
+        """Bring the latest messages back if the view was paged away from them"""
+        if self.end < len(self.log):
+            self.show_latest()
+    
+    def _insert_end(self, messages, start=None):
+        start = self.end if start is None else start
+        for offset, message in enumerate(messages):
+            self._set_mark(start + offset, "end-1c")
+            self.text.insert(tk.END, self._render(message))
+        self.end = start + len(messages)
+    
+    def _line(self, index):
+        return int(self.text.index(index).split(".")[0])
+    
+    def _trim_top(self):
+        """Drop the oldest messages in the widget beyond the window"""
+        excess = self.end - self.first - self.window
+        if excess <= 0:
+            return 0
+        removed = self._line(self._mark(self.first + excess)) - 1
+        self.text.delete("1.0", self._mark(self.first + excess))
+        for index in range(self.first, self.first + excess):
+            self.text.mark_unset(self._mark(index))
+        self.first += excess
+        return removed
+    
+    def _trim_bottom(self):
+        """Drop the newest messages in the widget beyond the window"""
+        excess = self.end - self.first - self.window
+        if excess <= 0:
+            return
+        self.text.delete(self._mark(self.end - excess), tk.END)
+        for index in range(self.end - excess, self.end):
+            self.text.mark_unset(self._mark(index))
+        self.end -= excess
+    
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self._paging or self._live is not None:
+            return
+        at_top, at_bottom = float(first) <= 0.0, float(last) >= 1.0
+        fits = at_top and at_bottom
+        if at_top and self.first > 0 and (not fits or self.end - self.first < self.window):
+            self._paging = True
+            self.text.after_idle(self._page_older)
+        elif at_bottom and not fits and self.end < len(self.log):
+            self._paging = True
+            self.text.after_idle(self._page_newer)
+    
+    def _page_older(self):
+        """Insert the page before the first message, keeping the view where it was"""
+        try:
+            start = max(0, self.first - self.page)
+            messages = self.log.read(start, self.first)
+            top = self._line("@0,0")
+            block = "".join(self._render(message) for message in messages)
+            self.text.insert("1.0", block)
+            # Marks are line-based: message i starts where the previous one ended
+            line = 1
+            for offset, message in enumerate(messages):
+                self._set_mark(start + offset, f"{line}.0")
+                line += self._render(message).count("\n")
+            if self.first < self.end:
+                self._set_mark(self.first, f"{line}.0")
+            self.first = start
+            self._trim_bottom()
+            self.text.yview(f"{top + line - 1}.0")
+        finally:
+            self._paging = False
+    
+    def _page_newer(self):
+        """Append the page after the last message, keeping the view where it was"""
+        try:
+            top = self._line("@0,0")
+            self._insert_end(self.log.read(self.end, self.end + self.page))
+            removed = self._trim_top()
+            self.text.yview(f"{max(1, top - removed)}.0")
+        finally:
+            self._paging = False
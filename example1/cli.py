@@ -0,0 +1,198 @@
+"""Headless command line entry points
+
+Nothing here imports Tk, so these commands work on display-less servers.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import logging
+import os
+from PIL import Image
+from .batch import BatchAnalyzer
+from .chat_manager import ChatManager
+from .payload import prepare_image
+from .store import DEFAULT_STORE_DIR, ScreenshotStore
+from .tracing import configure_logging
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".gif"}
+
+def find_images(directory, recursive=True):
+    """Image files under directory, sorted so runs are deterministic"""
+    found = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                found.append(os.path.join(root, name))
+        if not recursive:
+            break
+    return found
+
+def load_payload(path, trim=False):
+    """Decode and encode one image (runs in a worker process)"""
+    with Image.open(path) as image:
+        image.load()
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        return prepare_image(image, trim=trim)
+
+def read_checkpoint(output, prompt):
+    """Paths already analyzed successfully with this prompt in a previous run"""
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Line cut short when the last run was killed
+            if record.get("error") is None and record.get("prompt") == prompt:
+                done.add(record["path"])
+    return done
+
+def _prefetch(loop, pool, paths, lookahead, trim=False):
+    """Submit decode/encode jobs a few images ahead of the API requests"""
+    window = deque()
+    for path in paths:
+        window.append(loop.run_in_executor(pool, load_payload, path, trim))
+        if len(window) > lookahead:
+            yield window.popleft()
+    while window:
+        yield window.popleft()
+
+async def _analyze_directory(args, paths, out):
+    analyzer = BatchAnalyzer(concurrency=args.concurrency, requests_per_minute=args.rpm,
+                             tokens_per_minute=args.tpm, base_url=args.base_url)
+    loop = asyncio.get_running_loop()
+    failed = 0
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            items = _prefetch(loop, pool, paths, lookahead=args.workers * 2, trim=args.trim)
+            async for result in analyzer.analyze_many(items, args.prompt):
+                record = {
+                    "path": os.path.relpath(paths[result.index], args.directory),
+                    "prompt": args.prompt,
+                    "model": analyzer.model,
+                    "text": result.text,
+                    "error": result.error,
+                    "attempts": result.attempts,
+                    "latency": round(result.latency, 3),
+                    "input_tokens": result.input_tokens,
+                    "output_tokens": result.output_tokens,
+                    "completed_at": datetime.now().isoformat(timespec="seconds"),
+                }
+                # One flushed line per image is the checkpoint
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                if result.error:
+                    failed += 1
+                logging.info("[%d/%d] %s: %s", result.index + 1, len(paths), record["path"],
+                             "failed" if result.error else "ok")
+    finally:
+        await analyzer.close()
+    return failed
+
+def analyze_dir(args):
+    """Analyze every image in a directory, appending results to a JSONL file"""
+    prompt = args.prompt
+    done = read_checkpoint(args.output, prompt)
+    paths = [p for p in find_images(args.directory, recursive=not args.no_recursive)
+             if os.path.relpath(p, args.directory) not in done]
+    logging.info("%d image(s) already done, %d to analyze", len(done), len(paths))
+    if not paths:
+        return 0
+    
+    with open(args.output, "a+", encoding="utf-8") as out:
+        # Terminate a line left half-written by a killed run
+        if out.tell() > 0:
+            out.seek(out.tell() - 1)
+            if out.read(1) != "\n":
+                out.write("\n")
+        failed = asyncio.run(_analyze_directory(args, paths, out))
+    
+    if failed:
+        logging.error(f"{failed} image(s) failed; re-run the same command to retry them")
+        return 1
+    return 0
+
+def search(args):
+    """Print past analyses matching a full-text query"""
+    store = ScreenshotStore(args.store)
+    try:
+        results = store.search(args.query, limit=args.limit)
+    finally:
+        store.close()
+    for result in results:
+        created = datetime.fromtimestamp(result["created"]).isoformat(timespec="seconds")
+        print(f"{created}  {result['path']}\n    {result['prompt']}\n    {result['snippet']}")
+    if not results:
+        print("No matches")
+    return 0
+
+def serve(args):
+    """Run the capture-and-analyze HTTP service until interrupted"""
+    from .service import CaptureService
+    
+    store = None if args.no_store else ScreenshotStore(args.store)
+    service = CaptureService(host=args.host, port=args.port, workers=args.workers,
+                             queue_size=args.queue_size, token=args.token, store=store)
+    if not args.token:
+        print(f"Serving on {service.address}; send 'Authorization: Bearer {service.token}'", flush=True)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        if store is not None:
+            store.close()
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="example1",
+                                     description="Screenshot OCR. Run without arguments for the desktop app.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    analyze = commands.add_parser("analyze-dir", help="analyze a directory of images headlessly")
+    analyze.add_argument("directory", help="directory of images, e.g. screenshots/")
+    analyze.add_argument("-p", "--prompt", default=ChatManager.DEFAULT_PROMPT)
+    analyze.add_argument("-o", "--output", default="analyses.jsonl",
+                         help="JSONL results file; also the resume checkpoint (default: %(default)s)")
+    analyze.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                         help="processes for decoding/encoding images (default: %(default)s)")
+    analyze.add_argument("--concurrency", type=int, default=8, help="API requests in flight (default: %(default)s)")
+    analyze.add_argument("--rpm", type=float, default=50, help="requests per minute (default: %(default)s)")
+    analyze.add_argument("--tpm", type=float, default=40000,
+                         help="input tokens per minute (default: %(default)s)")
+    analyze.add_argument("--no-recursive", action="store_true", help="don't descend into subdirectories")
+    analyze.add_argument("--trim", action="store_true", help="cut uniform borders off each image before sending")
+    analyze.add_argument("--base-url", default=None, help=argparse.SUPPRESS)
+    analyze.set_defaults(handler=analyze_dir)
+    
+    find = commands.add_parser("search", help="full-text search over past analyses")
+    find.add_argument("query", help='FTS5 query, e.g. "timeout AND error" or conn*')
+    find.add_argument("--store", default=DEFAULT_STORE_DIR, help="store directory (default: %(default)s)")
+    find.add_argument("--limit", type=int, default=20)
+    find.set_defaults(handler=search)
+    
+    daemon = commands.add_parser("serve", help="serve captures and analyses over local HTTP")
+    daemon.add_argument("--host", default="127.0.0.1", help="interface to bind (default: %(default)s)")
+    daemon.add_argument("--port", type=int, default=8765)
+    daemon.add_argument("--workers", type=int, default=2, help="concurrent analyses (default: %(default)s)")
+    daemon.add_argument("--queue-size", type=int, default=8,
+                        help="analyses allowed to wait before 503 (default: %(default)s)")
+    daemon.add_argument("--token", default=os.getenv("EXAMPLE1_SERVICE_TOKEN"),
+                        help="bearer token clients must send (default: $EXAMPLE1_SERVICE_TOKEN, else a random one)")
+    daemon.add_argument("--store", default=DEFAULT_STORE_DIR, help="store directory (default: %(default)s)")
+    daemon.add_argument("--no-store", action="store_true", help="don't record analyses in the store")
+    daemon.set_defaults(handler=serve)
+    return parser
+
+def main(argv=None):
+    configure_logging()
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
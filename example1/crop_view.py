@@ -0,0 +1,83 @@
+class CropView:
+    """Non-destructive crop of a single source image
+    
+    The view is just a box in source coordinates; cropping composes boxes
+    and undo/redo swap 4-tuples, so no pixels are copied until
+    materialize() is called for saving or sending.
+    """
+    
+    def __init__(self, source):
+        self.source = source
+        self.box = (0, 0, source.width, source.height)
+        self._undo = []
+        self._redo = []
+        self._materialized = None
+    
+    @property
+    def width(self):
+        return self.box[2] - self.box[0]
+    
+    @property
+    def height(self):
+        return self.box[3] - self.box[1]
+    
+    @property
+    def size(self):
+        return self.width, self.height
+    
+    @property
+    def origin(self):
+        """Offset of the view's top-left corner in the source image"""
+        return self.box[0], self.box[1]
+    
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+    
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+    
+    def crop(self, box):
+        """Narrow the view to box, given relative to the current view
+        
+        Returns False (and changes nothing) if the clamped box is empty.
+        """
+        x1, y1, x2, y2 = box
+        left, top = self.origin
+        new_box = (
+            left + max(0, min(x1, self.width)),
+            top + max(0, min(y1, self.height)),
+            left + max(0, min(x2, self.width)),
+            top + max(0, min(y2, self.height)),
+        )
+        if new_box[2] <= new_box[0] or new_box[3] <= new_box[1]:
+            return False
+        self._undo.append(self.box)
+        self._redo.clear()
+        self.box = new_box
+        return True
+    
+    def undo(self):
+        """Step back to the previous crop; returns False if there is none"""
+        if not self._undo:
+            return False
+        self._redo.append(self.box)
+        self.box = self._undo.pop()
+        return True
+    
+    def redo(self):
+        """Re-apply an undone crop; returns False if there is none"""
+        if not self._redo:
+            return False
+        self._undo.append(self.box)
+        self.box = self._redo.pop()
+        return True
+    
+    def materialize(self):
+        """The cropped pixels as a standalone image (cached per box)"""
+        if self.box == (0, 0, self.source.width, self.source.height):
+            return self.source
+        if self._materialized is None or self._materialized[0] != self.box:
+            self._materialized = (self.box, self.source.crop(self.box))
+        return self._materialized[1]
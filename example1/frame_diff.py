@@ -0,0 +1,92 @@
+from dataclasses import dataclass, field
+from collections import deque
+import time
+import numpy as np
+from . import tracing
+
+@dataclass
+class FrameChange:
+    """A captured frame that differs enough from the previous one"""
+    image: object
+    # Dirty rectangles as (x1, y1, x2, y2) in image coordinates
+    boxes: list = field(default_factory=list)
+    # Fraction of pixels that changed, 0.0 - 1.0
+    changed_fraction: float = 0.0
+    timestamp: float = 0.0
+    index: int = 0
+
+class FrameDiffer:
+    """Vectorized change detection between consecutive frames
+    
+    A pixel counts as changed when any channel moved by more than
+    pixel_threshold. Changed pixels are pooled into block x block tiles and
+    neighbouring dirty tiles are merged into bounding boxes, so a blinking
+    cursor gives one small box and a scrolled log gives one big one.
+    """
+    
+    def __init__(self, block=16, pixel_threshold=24, min_changed=0.01):
+        self.block = block
+        self.pixel_threshold = pixel_threshold
+        self.min_changed = min_changed
+        self.previous = None
+    
+    def reset(self):
+        """Forget the reference frame; the next frame is reported as fully changed"""
+        self.previous = None
+    
+    def diff(self, frame):
+        """Compare an HxWx3 uint8 array against the previous frame
+        
+        Returns (changed_fraction, boxes) and makes frame the new reference.
+        """
+        previous, self.previous = self.previous, frame
+        height, width = frame.shape[:2]
+        if previous is None or previous.shape != frame.shape:
+            return 1.0, [(0, 0, width, height)]
+        
+        # |a - b| without widening to int16: max - min stays in uint8
+        delta = np.maximum(frame, previous) - np.minimum(frame, previous)
+        mask = delta.max(axis=2) > self.pixel_threshold
+        changed = float(mask.mean())
+        if not changed:
+            return 0.0, []
+        return changed, self._boxes(mask)
+    
+    def _boxes(self, mask):
+        """Merge dirty tiles into pixel-space bounding boxes"""
+        b = self.block
+        height, width = mask.shape
+        pad_h, pad_w = -height % b, -width % b
+        if pad_h or pad_w:
+            mask = np.pad(mask, ((0, pad_h), (0, pad_w)))
+        tiles = mask.reshape(mask.shape[0] // b, b, mask.shape[1] // b, b).any(axis=(1, 3))
+        
+        # 8-connected components over the (small) tile grid
+        rows, cols = tiles.shape
+        seen = np.zeros_like(tiles)
+        boxes = []
+        for r, c in zip(*np.nonzero(tiles)):
+            if seen[r, c]:
+                continue
+            seen[r, c] = True
+            r1, c1, r2, c2 = r, c, r, c
+            queue = deque([(r, c)])
+            while queue:
+                y, x = queue.popleft()
+                r1, c1, r2, c2 = min(r1, y), min(c1, x), max(r2, y), max(c2, x)
+                for ny in range(max(y - 1, 0), min(y + 2, rows)):
+                    for nx in range(max(x - 1, 0), min(x + 2, cols)):
+                        if tiles[ny, nx] and not seen[ny, nx]:
+                            seen[ny, nx] = True
+                            queue.append((ny, nx))
+            boxes.append((int(c1 * b), int(r1 * b), int(min((c2 + 1) * b, width)), int(min((r2 + 1) * b, height))))
+        return boxes
+    
+    def update(self, image, index=0):
+        """Diff a PIL image; return a FrameChange if it passes min_changed, else None"""
+        with tracing.span("watch.diff"):
+            changed, boxes = self.diff(np.asarray(image))
+        if changed < self.min_changed:
+            return None
+        return FrameChange(image=image, boxes=boxes, changed_fraction=changed,
+                           timestamp=time.time(), index=index)
@@ -0,0 +1,98 @@
+import logging
+import queue
+import time
+
+# pynput notation -> Tk event modifier
+_TK_MODIFIERS = {
+    "<ctrl>": "Control",
+    "<shift>": "Shift",
+    "<alt>": "Alt",
+    "<cmd>": "Meta",
+}
+
+# pynput special key name -> Tk keysym (function keys are handled generically)
+_TK_KEYSYMS = {
+    "space": "space",
+    "enter": "Return",
+    "esc": "Escape",
+    "tab": "Tab",
+    "print_screen": "Print",
+}
+
+def to_tk_sequence(combo):
+    """Translate a pynput hotkey like '<ctrl>+<shift>+s' into a Tk event sequence"""
+    parts = combo.lower().split("+")
+    modifiers = [_TK_MODIFIERS[p] for p in parts[:-1]]
+    key = parts[-1]
+    if key.startswith("<") and key.endswith(">"):
+        name = key[1:-1]
+        key = name.upper() if name[1:].isdigit() else _TK_KEYSYMS.get(name, name)
+    elif "Shift" in modifiers and key.isalpha():
+        key = key.upper()
+    return "<" + "-".join(modifiers + ["KeyPress", key]) + ">"
+
+class GlobalHotkey:
+    """System-wide hotkey that calls back on the Tk thread
+    
+    The callback receives the time.perf_counter() value at which the key was
+    seen, so callers can measure trigger-to-result latency.
+    
+    Uses pynput when it is installed (``poetry install -E hotkey``). Without
+    it the combo is bound on the Tk application instead, which only fires
+    while one of our windows has focus.
+    """
+    
+    POLL_MS = 50
+    
+    def __init__(self, root, combo, callback):
+        self.root = root
+        self.combo = combo
+        self.callback = callback
+        self._listener = None
+        self._tk_sequence = None
+        self._presses = queue.Queue()
+        self._poll_id = None
+    
+    def start(self):
+        """Register the hotkey; returns True if it is truly global"""
+        try:
+            from pynput import keyboard
+        except ImportError:
+            self._tk_sequence = to_tk_sequence(self.combo)
+            self.root.bind_all(self._tk_sequence, lambda event: self.callback(time.perf_counter()))
+            logging.warning(f"pynput not installed; hotkey {self.combo} only works while the app has focus")
+            return False
+        
+        # pynput fires on its own listener thread, where Tk calls aren't safe;
+        # _poll picks the presses up on the Tk thread
+        def fire():
+            self._presses.put(time.perf_counter())
+        
+        self._listener = keyboard.GlobalHotKeys({self.combo: fire})
+        self._listener.daemon = True
+        self._listener.start()
+        self._poll_id = self.root.after(self.POLL_MS, self._poll)
+        logging.info("Global hotkey registered: %s", self.combo)
+        return True
+    
+    def _poll(self):
+        """Run the callback for presses seen by the listener thread"""
+        while True:
+            try:
+                triggered_at = self._presses.get_nowait()
+            except queue.Empty:
+                break
+            self.callback(triggered_at)
+        self._poll_id = self.root.after(self.POLL_MS, self._poll)
+    
+    def stop(self):
+        """Unregister the hotkey"""
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        if self._tk_sequence is not None:
+            self.root.unbind_all(self._tk_sequence)
+            self._tk_sequence = None
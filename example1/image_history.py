@@ -0,0 +1,380 @@
+"""Capture history with a memory budget
+
+Recent captures stay in RAM as PIL images. Once their total size passes
+the budget, the least recently used ones are written to raw pixel files in
+a per-process directory under .cache/history and dropped from memory. Asking for one again maps
+its file and decodes it straight out of the page cache. Spill files are
+written once and never change, so evicting a paged-in capture a second
+time costs nothing.
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import ctypes
+import logging
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from PIL import Image
+from . import tracing
+
+# Captures held in RAM, in MiB of decoded pixels
+DEFAULT_BUDGET_MB = int(os.environ.get("EXAMPLE1_HISTORY_MB", 256))
+# Spill files kept, in MiB; the oldest captures are forgotten beyond this
+DEFAULT_DISK_BUDGET_MB = int(os.environ.get("EXAMPLE1_HISTORY_DISK_MB", 2048))
+# Captures kept at all
+MAX_ENTRIES = 100
+# Spill files go on disk next to the other caches, not in /tmp, which is
+# often a tmpfs: spilling there would only move the pixels to other RAM
+DEFAULT_HISTORY_DIR = os.environ.get("EXAMPLE1_HISTORY_DIR", os.path.join(".cache", "history"))
+# Rows written per chunk when spilling, so spilling never copies a whole frame
+SPILL_ROWS = 256
+
+# Modes written as-is; anything else is converted to RGBA before spilling
+RAW_MODES = ("L", "RGB", "RGBA")
+# Bytes per pixel in Pillow's in-memory layout (RGB is padded to four)
+PIXEL_BYTES = {"1": 1, "L": 1, "P": 1, "I;16": 2}
+
+_libc = None
+
+def _release_freed_memory():
+    """Ask glibc to hand freed heap pages back to the OS
+    
+    Full frames freed in a different order than they were allocated leave
+    holes in the heap that malloc keeps, so without this RSS only grows.
+    """
+    global _libc
+    if not sys.platform.startswith("linux"):
+        return
+    try:
+        if _libc is None:
+            _libc = ctypes.CDLL("libc.so.6")
+        _libc.malloc_trim(0)
+    except (OSError, AttributeError):
+        # Not glibc (musl, for one); nothing to do
+        _libc = False
+
+def _filesystem_type(path):
+    """Type of the filesystem path is on ("tmpfs", "ext4", ...), or None if unknown"""
+    path = os.path.realpath(path)
+    best, best_type = "", None
+    try:
+        with open("/proc/self/mounts") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                # Spaces in mount points are escaped as \040
+                mount = fields[1].replace("\\040", " ")
+                inside = path == mount or path.startswith(mount.rstrip("/") + "/")
+                if inside and len(mount) >= len(best):
+                    best, best_type = mount, fields[2]
+    except OSError:
+        return None
+    return best_type
+
+def _remove_stale_directories(parent):
+    """Delete spill directories left behind by processes that no longer run"""
+    if os.name != "posix":
+        # os.kill(pid, 0) can't be used to probe a process elsewhere
+        return
+    for name in os.listdir(parent):
+        pid = name.split("-", 1)[0]
+        if not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            logging.info("Removing capture history left by process %s", pid)
+            shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+        except OSError:
+            # Running, under another user
+            pass
+
+def _rss_mib():
+    """Current resident set size, or None where /proc isn't available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return None
+
+class HistoryEntry:
+    """One capture; its pixels are either in memory or in a spill file"""
+    
+    def __init__(self, entry_id, image, metadata):
+        self.id = entry_id
+        self.size = image.size
+        self.mode = image.mode
+        self.metadata = metadata
+        self.added_at = time.time()
+        self.path = None
+        # Size of the spill file
+        self.disk_bytes = 0
+        # Queued for or being written by the writer thread
+        self.writing = False
+        self._image = image
+    
+    @property
+    def nbytes(self):
+        return self.size[0] * self.size[1] * PIXEL_BYTES.get(self.mode, 4)
+    
+    @property
+    def in_memory(self):
+        return self._image is not None
+    
+    @property
+    def spilled(self):
+        return self.path is not None
+
+class ImageHistory:
+    """Recent captures within a memory budget, older ones paged to disk
+        
+        history = ImageHistory(budget_mb=256)
+        entry = history.add(image, monitor=1)
+        ...
+        image = history.image(entry.id)   # read back from disk if it was spilled
+    """
+    
+    def __init__(self, budget_mb=DEFAULT_BUDGET_MB, disk_budget_mb=DEFAULT_DISK_BUDGET_MB, directory=None,
+                 max_entries=MAX_ENTRIES, keep=1):
+        """keep: most recently used captures that stay in memory even over budget
+        
+        directory: where spill files go; if not given, a directory of this
+        process's own under DEFAULT_HISTORY_DIR, removed by close().
+        """
+        self.budget = int(budget_mb * 2**20)
+        self.disk_budget = int(disk_budget_mb * 2**20)
+        self.max_entries = max_entries
+        self.keep = max(1, keep)
+        self._own_directory = directory is None
+        if directory is None:
+            os.makedirs(DEFAULT_HISTORY_DIR, exist_ok=True)
+            _remove_stale_directories(DEFAULT_HISTORY_DIR)
+            directory = tempfile.mkdtemp(prefix=f"{os.getpid()}-", dir=DEFAULT_HISTORY_DIR)
+        self.directory = directory
+        if _filesystem_type(directory) == "tmpfs":
+            logging.warning(f"Capture history directory {directory} is on tmpfs; spilled captures will still "
+                            f"use memory. Set EXAMPLE1_HISTORY_DIR to a directory on disk.")
+        # Least recently used first
+        self._recent = OrderedDict()
+        # Capture order, for browsing
+        self._order = []
+        self._next_id = 0
+        self._lock = threading.RLock()
+        self.spills = 0
+        self.page_ins = 0
+        # Captures dropped because their spill file couldn't be written
+        self.dropped = 0
+        # Spill files are written off the capture path, one at a time
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history")
+        self._writes = []
+    
+    def __len__(self):
+        return len(self._order)
+    
+    @property
+    def entries(self):
+        """All captures, oldest first"""
+        with self._lock:
+            return [self._recent[entry_id] for entry_id in self._order]
+    
+    def add(self, image, **metadata):
+        """Record a capture as the most recent entry and enforce the budget"""
+        with self._lock:
+            entry = HistoryEntry(self._next_id, image, metadata)
+            self._next_id += 1
+            self._recent[entry.id] = entry
+            self._order.append(entry.id)
+            self._enforce_budget()
+            while len(self._order) > self.max_entries or (
+                    len(self._order) > self.keep and self.disk_bytes() > self.disk_budget):
+                self._remove(self._order[0])
+        self._wait_for_writer(allowance=entry.nbytes)
+        logging.debug("Added capture %d to history: %s", entry.id, self.report())
+        return entry
+    
+    def get(self, entry_id):
+        """The entry with this id, or None if it has been dropped"""
+        with self._lock:
+            return self._recent.get(entry_id)
+    
+    def image(self, entry_id):
+        """The capture's pixels, paged in from disk if needed; None if dropped"""
+        with self._lock:
+            entry = self._recent.get(entry_id)
+            if entry is None:
+                return None
+            self._recent.move_to_end(entry_id)
+            if entry._image is None:
+                entry._image = self._page_in(entry)
+                self.page_ins += 1
+                self._enforce_budget()
+            return entry._image
+    
+    def neighbour(self, entry_id, step):
+        """The entry step places after (or before, if negative) entry_id in capture order"""
+        with self._lock:
+            if entry_id not in self._recent:
+                return None
+            index = self._order.index(entry_id) + step
+            if 0 <= index < len(self._order):
+                return self._recent[self._order[index]]
+            return None
+    
+    def memory_bytes(self):
+        with self._lock:
+            return sum(entry.nbytes for entry in self._recent.values() if entry.in_memory)
+    
+    def disk_bytes(self):
+        with self._lock:
+            return sum(entry.disk_bytes for entry in self._recent.values())
+    
+    def usage(self):
+        """Memory and disk use of the history, plus process RSS, in MiB"""
+        with self._lock:
+            entries = list(self._recent.values())
+        in_memory = [entry for entry in entries if entry.in_memory]
+        spilled = [entry for entry in entries if not entry.in_memory]
+        return {
+            "entries": len(entries),
+            "in_memory": len(in_memory),
+            "memory_mib": round(sum(entry.nbytes for entry in in_memory) / 2**20, 1),
+            "budget_mib": round(self.budget / 2**20, 1),
+            "spilled": len(spilled),
+            "disk_mib": round(sum(entry.disk_bytes for entry in entries) / 2**20, 1),
+            "disk_budget_mib": round(self.disk_budget / 2**20, 1),
+            "spills": self.spills,
+            "page_ins": self.page_ins,
+            "dropped": self.dropped,
+            "rss_mib": _rss_mib(),
+        }
+    
+    def report(self):
+        """usage() as one line"""
+        usage = self.usage()
+        text = (f"{usage['in_memory']} in memory ({usage['memory_mib']:.0f}/{usage['budget_mib']:.0f} MiB), "
+                f"{usage['spilled']} on disk ({usage['disk_mib']:.0f} MiB)")
+        if usage["rss_mib"] is not None:
+            text += f", process {usage['rss_mib']:.0f} MiB"
+        return text
+    
+    def flush(self):
+        """Wait until every queued spill file has been written"""
+        self._wait_for_writer()
+    
+    def close(self):
+        """Forget every capture and delete the spill files"""
+        self._writer.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            self._recent.clear()
+            self._order.clear()
+            if self._own_directory:
+                shutil.rmtree(self.directory, ignore_errors=True)
+    
+    def _enforce_budget(self):
+        """Spill least recently used captures until the rest fit in the budget
+        
+        Captures already on disk are dropped at once; the others are queued
+        for the writer thread and dropped when their file is complete.
+        """
+        candidates = list(self._recent.values())[:-self.keep]
+        used = sum(entry.nbytes for entry in self._recent.values() if entry.in_memory and not entry.writing)
+        freed = False
+        for entry in candidates:
+            if used <= self.budget:
+                break
+            if not entry.in_memory or entry.writing:
+                continue
+            used -= entry.nbytes
+            if entry.path is None:
+                entry.writing = True
+                self._writes.append(self._writer.submit(self._write, entry, entry._image))
+            else:
+                entry._image = None
+                freed = True
+        if freed:
+            _release_freed_memory()
+    
+    def _wait_for_writer(self, allowance=None):
+        """Block while queued writes hold more than allowance bytes over the budget
+        
+        Captures can arrive faster than the disk takes them; waiting for the
+        oldest write then is what keeps memory from growing without bound.
+        With no allowance, wait for every queued write.
+        """
+        while True:
+            with self._lock:
+                self._writes = [write for write in self._writes if not write.done()]
+                if not self._writes or (allowance is not None and self.memory_bytes() <= self.budget + allowance):
+                    return
+                oldest = self._writes[0]
+            with tracing.span("history.wait"):
+                oldest.result()
+    
+    def _write(self, entry, image):
+        """Write a capture's raw pixels to its spill file (writer thread)
+        
+        A capture that can't be written is dropped rather than kept in
+        memory for another try, which would let the history grow without
+        bound for as long as the disk keeps failing.
+        """
+        path = None
+        try:
+            if image.mode not in RAW_MODES:
+                image = image.convert("RGBA")
+            path = os.path.join(self.directory, f"{entry.id:06d}-{image.width}x{image.height}-{image.mode}.raw")
+            with tracing.span("history.spill"), open(path, "wb") as f:
+                for top in range(0, image.height, SPILL_ROWS):
+                    f.write(image.crop((0, top, image.width, min(image.height, top + SPILL_ROWS))).tobytes())
+        except Exception as e:
+            logging.error(f"Could not spill capture {entry.id} to disk, dropping it: {e}", exc_info=True)
+            if path is not None:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            del image
+            with self._lock:
+                entry.writing = False
+                entry._image = None
+                if entry.id in self._recent:
+                    self._remove(entry.id)
+                    self.dropped += 1
+            _release_freed_memory()
+            return
+        del image
+        with self._lock:
+            entry.writing = False
+            if entry.id not in self._recent:
+                # Forgotten while it was being written
+                os.remove(path)
+                return
+            entry.path = path
+            if entry.mode not in RAW_MODES:
+                entry.mode = "RGBA"
+            entry.disk_bytes = os.path.getsize(path)
+            self.spills += 1
+            self._enforce_budget()
+    
+    def _page_in(self, entry):
+        """Read a spilled capture back through a read-only mapping of its file"""
+        with tracing.span("history.page_in"):
+            with open(entry.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                image = Image.frombuffer(entry.mode, entry.size, mapped, "raw", entry.mode, 0, 1)
+                # L and RGBA map the file directly; copy them so the mapping can close
+                if image.readonly:
+                    image = image.copy()
+        return image
+    
+    def _remove(self, entry_id):
+        entry = self._recent.pop(entry_id)
+        self._order.remove(entry_id)
+        if entry.path is not None:
+            try:
+                os.remove(entry.path)
+            except OSError as e:
+                logging.warning(f"Could not delete history file {entry.path}: {e}")
@@ -1,72 +1,24 @@
-import tkinter as tk
-from tkinter import ttk
-from PIL import Image, ImageTk
-import mss
-import mss.tools
-from datetime import datetime
 import os
+import sys
 import logging
-from .ui import ScreenshotUI
+from . import startup
+from .tracing import configure_logging
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
-
-class ScreenshotManager:
-    def __init__(self):
-        self.screenshot = None
-        self.original_screenshot = None
-        self.cropped_image = None
-    
-    def capture_screen(self):
-        """Capture the screen and return the image"""
-        logging.info("Starting screenshot capture")
-        try:
-            with mss.mss() as sct:
-                # Capture entire screen
-                monitor = sct.monitors[0]
-                logging.debug(f"Monitor info: {monitor}")
-                screenshot = sct.grab(monitor)
-                logging.info(f"Screenshot captured: {screenshot.width}x{screenshot.height}")
-                
-                # Save screenshot to temporary file
-                temp_filename = "temp_screenshot.png"
-                logging.debug(f"Saving screenshot to: {temp_filename}")
-                mss.tools.to_png(screenshot.rgb, screenshot.size, output=temp_filename)
-                
-                # Load and return image
-                self.original_screenshot = Image.open(temp_filename)
-                os.remove(temp_filename)
-                return self.original_screenshot
-                
-        except Exception as e:
-            logging.error(f"Screenshot capture failed: {e}", exc_info=True)
-            return None
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    configure_logging()
+    if "--startup-report" in argv:
+        # Print how long the window took to appear and what had loaded by then
+        argv.remove("--startup-report")
+        startup.enable_report()
+    if argv:
+        # Headless subcommands; keep Tk out of the import graph
+        from .cli import main as cli_main
+        return cli_main(argv)
     
-    def crop_image(self, image, box):
-        """Crop image with given box coordinates"""
-        try:
-            self.cropped_image = image.crop(box)
-            return self.cropped_image
-        except Exception as e:
-            logging.error(f"Error cropping image: {e}", exc_info=True)
-            return None
+    import tkinter as tk
+    from .ui import ScreenshotUI
     
-    def save_screenshot(self, image, directory="screenshots"):
-        """Save the image to a file"""
-        try:
-            if not os.path.exists(directory):
-                os.makedirs(directory)
-            
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{directory}/screenshot_{timestamp}.png"
-            image.save(filename)
-            logging.info(f"Screenshot saved: {filename}")
-            return True
-        except Exception as e:
-            logging.error(f"Error saving screenshot: {e}", exc_info=True)
-            return False
-
-def main():
     # Initialize X threads for Linux
     try:
         if os.name != 'nt':  # Not Windows
@@ -76,8 +28,9 @@ def main():
         logging.warning(f"Failed to initialize X threads: {e}")
 
     root = tk.Tk()
+    startup.mark("window")
     app = ScreenshotUI(root)
     root.mainloop()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main()) 
\ No newline at end of file
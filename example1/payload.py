@@ -0,0 +1,176 @@
+from dataclasses import dataclass, field
+from PIL import Image
+import numpy as np
+import base64
+import functools
+import io
+import logging
+from . import tracing
+from .trim import trim_image
+
+# Claude downsamples anything with a long edge above 1568 px or more than
+# ~1.15 megapixels, so sending more than that only costs upload time
+MAX_LONG_EDGE = 1568
+MAX_PIXELS = 1_150_000
+
+# Candidate encoders per content type: (media_type, PIL format, save kwargs),
+# fastest first. Later ones are only tried while the best so far is over
+# ENCODE_TARGET_BYTES: lossless WebP saves about a tenth of the bytes of PNG
+# for twice the encode time (~300 ms at 1568 px), which on a typical uplink
+# only pays off for multi-megabyte payloads
+ENCODE_TARGET_BYTES = 2 * 1024 * 1024
+TEXT_FORMATS = [
+    ("image/png", "PNG", {"compress_level": 6}),
+    ("image/webp", "WEBP", {"lossless": True, "method": 4}),
+]
+PHOTO_FORMATS = [
+    ("image/jpeg", "JPEG", {"quality": 85}),
+    ("image/webp", "WEBP", {"quality": 80, "method": 4}),
+]
+
+@dataclass
+class ImagePayload:
+    """An encoded image ready to go into a messages request"""
+    data: str
+    media_type: str
+    width: int
+    height: int
+    content_type: str
+    source_size: tuple
+    encoded_bytes: int
+    # Uncompressed RGB size of the source image
+    raw_bytes: int
+    # Part of the source that was encoded, (left, top, right, bottom); less
+    # than the whole image when it was trimmed
+    source_box: tuple = None
+    # That part at full resolution, for legacy_bytes
+    source: object = field(default=None, repr=False, compare=False)
+    
+    @functools.cached_property
+    def legacy_bytes(self):
+        """Estimated size of the full-resolution PNG sent before payloads were optimized
+        
+        Worked out on first use (see estimate_png_bytes), so only reports pay
+        for it, not requests.
+        """
+        return estimate_png_bytes(self.source) if self.source is not None else 0
+    
+    @property
+    def bytes_saved(self):
+        """Upload bytes saved against the full-resolution PNG
+        
+        Negative when resizing made the image compress worse, as it can for
+        crisp text: the antialiased result has far fewer flat runs.
+        """
+        return self.legacy_bytes - self.encoded_bytes
+    
+    def to_source(self, x, y):
+        """Map a pixel position in the encoded image back to the source image"""
+        left, top, right, bottom = self.source_box or (0, 0) + tuple(self.source_size)
+        return (left + x * (right - left) / self.width,
+                top + y * (bottom - top) / self.height)
+    
+    def to_block(self):
+        """The image content block for the messages API"""
+        return {
+            "type": "image",
+            "source": {"type": "base64", "media_type": self.media_type, "data": self.data},
+        }
+
+def target_size(width, height, max_long_edge=MAX_LONG_EDGE, max_pixels=MAX_PIXELS):
+    """Largest size within the model's limits that keeps the aspect ratio"""
+    scale = min(1.0, max_long_edge / max(width, height), (max_pixels / (width * height)) ** 0.5)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+def classify_content(image, sample_rows=32):
+    """Return 'text' for screenshots of UI/text and 'photo' for natural images
+    
+    Rendered text and UI are dominated by flat runs of identical pixels;
+    photos and video frames almost never repeat a neighbour exactly. Only a
+    few full-resolution rows are inspected, since resampling would blur the
+    very runs we are looking for.
+    """
+    step = max(1, image.height // sample_rows)
+    rows = [np.asarray(image.crop((0, y, image.width, y + 1)).convert("RGB"))[0]
+            for y in range(step // 2, image.height, step)]
+    pixels = np.stack(rows)
+    flat = (pixels[:, 1:] == pixels[:, :-1]).all(axis=2).mean()
+    return "text" if flat > 0.5 else "photo"
+
+def estimate_png_bytes(image, bands=8, rows=8):
+    """Approximate PNG size of image from a few full-width bands of rows
+    
+    Encoding the whole image just to report what it would have cost is the
+    slow path payloads exist to avoid; bands keep each row's neighbours, so
+    PNG's filters and zlib see the same redundancy as in the full image.
+    Within a few percent on screenshots, for about 1/16 of a full encode.
+    """
+    if image.height <= bands * rows:
+        sample = image
+    else:
+        step = image.height // bands
+        sample = Image.new(image.mode, (image.width, bands * rows))
+        for i in range(bands):
+            top = i * step + (step - rows) // 2
+            sample.paste(image.crop((0, top, image.width, top + rows)), (0, i * rows))
+    buffered = io.BytesIO()
+    sample.save(buffered, format="PNG")
+    return buffered.tell() * image.height // sample.height
+
+def prepare_image(image, max_long_edge=MAX_LONG_EDGE, max_pixels=MAX_PIXELS, trim=False):
+    """Resize and encode an image for upload, picking the smallest suitable format
+    
+    With trim, uniform borders and empty margins are cut off first (see
+    trim.trim_image); payload.source_box records what was kept.
+    """
+    source_size = image.size
+    raw_bytes = image.width * image.height * 3
+    source_box = (0, 0) + source_size
+    if trim:
+        trimmed = trim_image(image)
+        image, source_box = trimmed.image, trimmed.box
+    original = image
+    with tracing.span("payload.classify"):
+        content_type = classify_content(image)
+    
+    size = target_size(image.width, image.height, max_long_edge, max_pixels)
+    if size != image.size:
+        # reducing_gap lets Pillow box-reduce first, then Lanczos the rest
+        with tracing.span("payload.resize"):
+            image = image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+    
+    candidates = TEXT_FORMATS if content_type == "text" else PHOTO_FORMATS
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    
+    best = None
+    with tracing.span("payload.encode"):
+        for media_type, fmt, options in candidates:
+            if best is not None and len(best[1]) <= ENCODE_TARGET_BYTES:
+                break
+            buffered = io.BytesIO()
+            image.save(buffered, format=fmt, **options)
+            if best is None or buffered.tell() < len(best[1]):
+                best = (media_type, buffered.getvalue())
+    media_type, encoded = best
+    
+    with tracing.span("payload.base64"):
+        data = base64.b64encode(encoded).decode()
+    payload = ImagePayload(
+        data=data,
+        media_type=media_type,
+        width=image.width,
+        height=image.height,
+        content_type=content_type,
+        source_size=source_size,
+        encoded_bytes=len(encoded),
+        raw_bytes=raw_bytes,
+        source_box=source_box,
+        # Not the resized image: downsampling antialiases text, which can
+        # make the smaller image the larger PNG
+        source=original,
+    )
+    logging.info("Payload %dx%d -> %dx%d %s (%s): %.0f KB",
+                 source_size[0], source_size[1], payload.width, payload.height, media_type,
+                 content_type, len(encoded) / 1024)
+    return payload
@@ -0,0 +1,59 @@
+from PIL import Image, ImageTk
+import weakref
+
+class PreviewRenderer:
+    """Renders canvas previews from a cached image pyramid
+    
+    Level k of the pyramid is the source box-reduced by 2**k. Levels are
+    built on first use from the nearest finer level and cached until a
+    different source image is rendered, so re-previews and zooms of the
+    same capture start from a level just above the target size instead of
+    from the full-resolution pixels.
+    """
+    
+    def __init__(self, resample=Image.BILINEAR):
+        # Bilinear is plenty once the pyramid has done the heavy reduction
+        self.resample = resample
+        self._source = None
+        self._levels = {}
+    
+    def _use_source(self, image):
+        source = self._source() if self._source is not None else None
+        if source is not image:
+            self._source = weakref.ref(image)
+            self._levels = {0: image}
+    
+    def level(self, image, k):
+        """The source reduced by 2**k, built from the nearest cached finer level"""
+        self._use_source(image)
+        if k not in self._levels:
+            finer = max(level for level in self._levels if level < k)
+            self._levels[k] = self._levels[finer].reduce(2 ** (k - finer))
+        return self._levels[k]
+    
+    def render(self, image, max_width, max_height, box=None):
+        """Fit image (or its box region) into max_width x max_height
+        
+        Returns (preview, size). box is (x1, y1, x2, y2) in source
+        coordinates and is resampled straight out of the pyramid level, so
+        previewing a crop never copies full-resolution pixels.
+        """
+        x1, y1, x2, y2 = box or (0, 0, image.width, image.height)
+        width, height = x2 - x1, y2 - y1
+        scale = min(max_width / width, max_height / height)
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        
+        # Deepest level that is still at least as large as the target
+        k = 0
+        while scale * 2 ** (k + 1) <= 1 and min(width, height) >> (k + 1) > 0:
+            k += 1
+        source = self.level(image, k)
+        if box is None and source.size == size:
+            return source, size
+        f = 2 ** k
+        return source.resize(size, self.resample, box=(x1 / f, y1 / f, x2 / f, y2 / f)), size
+    
+    def render_photo(self, image, max_width, max_height, box=None):
+        """render() converted in memory to a Tk PhotoImage"""
+        preview, size = self.render(image, max_width, max_height, box)
+        return ImageTk.PhotoImage(preview), size
@@ -0,0 +1,249 @@
+from collections import OrderedDict
+import functools
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import weakref
+import numpy as np
+from .store import image_digest
+
+# Side of the squares fuzzy matching compares, in pixels
+TILE_SIZE = 64
+
+def tile_signature(image, tile=TILE_SIZE):
+    """Checksums of the image's tile x tile squares, after its width and height
+    
+    Each checksum weights the square's pixels by fixed odd random factors,
+    so any change to a single pixel changes it. Two signatures of the same
+    size compare square by square: a blinking cursor changes one, a
+    rewritten line of text a whole row of them.
+    """
+    pixels = np.asarray(image.convert("RGB"), dtype=np.uint32)
+    height, width = pixels.shape[:2]
+    pixels = np.pad(pixels, ((0, -height % tile), (0, -width % tile), (0, 0)))
+    squares = pixels.reshape(pixels.shape[0] // tile, tile, pixels.shape[1] // tile, tile, 3)
+    # Sums wrap around in uint32, which is fine for a checksum
+    sums = np.einsum("ayxzc,yzc->ax", squares, _tile_weights(tile))
+    return np.concatenate([[width, height], sums.ravel()]).astype(np.uint32).tobytes()
+
+@functools.cache
+def _tile_weights(tile):
+    return np.random.default_rng(0).integers(0, 2**32, size=(tile, tile, 3), dtype=np.uint32) | 1
+
+def request_key(prompt, model):
+    """Stable digest of everything besides the image that determines a response"""
+    return hashlib.sha256(f"{model}\0{prompt}".encode()).hexdigest()
+
+class ResponseCache:
+    """Two-tier cache of analysis responses keyed by prompt, model and image
+    
+    Images match only when their decoded pixels are identical (sha256), so
+    a screenshot with one changed line of text never gets another one's
+    answer. The memory tier is an LRU of max_memory_entries; the optional
+    disk tier is a SQLite file trimmed to max_disk_bytes by least-recent
+    access. Entries older than ttl seconds are ignored and purged.
+    
+    fuzzy_distance opts in to a second lookup after an exact miss: an
+    image of the same size that differs from a cached one in at most that
+    many TILE_SIZE squares reuses its response. 1 lets a blinking cursor
+    or a ticking clock hit while an edited line of text, which spans
+    several squares, misses; a one-character edit can still match.
+    """
+    
+    def __init__(self, path=None, max_memory_entries=128, max_disk_bytes=50 * 2**20,
+                 ttl=7 * 24 * 3600, fuzzy_distance=None):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self.fuzzy_distance = fuzzy_distance
+        # (request_key, digest) -> (response, created, tiles)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        # Last hashed image, since get() and put() see the same one in a row
+        self._memo = (None, None)
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.fuzzy_hits = 0
+        
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(responses)")]
+            if columns and "tiles" not in columns:
+                # Written by a version that matched on a perceptual hash
+                logging.info("Discarding response cache keyed by perceptual hash")
+                self._db.execute("DROP TABLE responses")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    request_key TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    tiles BLOB,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL,
+                    PRIMARY KEY (request_key, digest)
+                )""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            self._db.commit()
+    
+    def _hashes(self, image):
+        """(sha256 of the pixels, tile signature or None), memoized for the last image"""
+        ref, hashes = self._memo
+        if ref is not None and ref() is image:
+            return hashes
+        tiles = tile_signature(image) if self.fuzzy_distance is not None else None
+        hashes = (image_digest(image), tiles)
+        self._memo = (weakref.ref(image), hashes)
+        return hashes
+    
+    def get(self, image, prompt, model):
+        """Return the cached response for this exact image, or None"""
+        key = request_key(prompt, model)
+        digest, tiles = self._hashes(image)
+        now = time.time()
+        with self._lock:
+            response = self._get_memory(key, digest, now)
+            if response is not None:
+                self.hits += 1
+                self.memory_hits += 1
+                return response
+            
+            response = self._get_disk(key, digest, now)
+            if response is not None:
+                self.hits += 1
+                self.disk_hits += 1
+                self._put_memory(key, digest, tiles, response, now)
+                return response
+            
+            if self.fuzzy_distance is not None:
+                response = self._get_similar(key, tiles, now)
+                if response is not None:
+                    self.hits += 1
+                    self.fuzzy_hits += 1
+                    return response
+            
+            self.misses += 1
+            return None
+    
+    def put(self, image, prompt, model, response):
+        """Store a response for this image/prompt/model"""
+        key = request_key(prompt, model)
+        digest, tiles = self._hashes(image)
+        now = time.time()
+        with self._lock:
+            self._put_memory(key, digest, tiles, response, now)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, digest, tiles, response, len(response.encode()) + len(tiles or b""), now, now))
+                self._evict_disk(now)
+                self._db.commit()
+    
+    def stats(self):
+        """Hit/miss counters and tier sizes"""
+        with self._lock:
+            disk_entries = disk_bytes = 0
+            if self._db is not None:
+                disk_entries, disk_bytes = self._db.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "fuzzy_hits": self.fuzzy_hits,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+                "disk_bytes": disk_bytes,
+            }
+    
+    def clear(self):
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+    
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+    
+    def _distance(self, a, b):
+        """Number of squares that differ, or None if the images' sizes do"""
+        if a is None or b is None or len(a) != len(b) or a[:8] != b[:8]:
+            return None
+        return int(np.count_nonzero(np.frombuffer(a, np.uint32) != np.frombuffer(b, np.uint32)))
+    
+    def _get_memory(self, key, digest, now):
+        entry = self._memory.get((key, digest))
+        if entry is None:
+            return None
+        if now - entry[1] > self.ttl:
+            del self._memory[(key, digest)]
+            return None
+        self._memory.move_to_end((key, digest))
+        return entry[0]
+    
+    def _put_memory(self, key, digest, tiles, response, now):
+        if self.max_memory_entries <= 0:
+            return
+        self._memory[(key, digest)] = (response, now, tiles)
+        self._memory.move_to_end((key, digest))
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+    
+    def _get_disk(self, key, digest, now):
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT response FROM responses WHERE request_key = ? AND digest = ? AND created >= ?",
+            (key, digest, now - self.ttl)).fetchone()
+        if row is None:
+            return None
+        self._db.execute("UPDATE responses SET accessed = ? WHERE request_key = ? AND digest = ?",
+                         (now, key, digest))
+        self._db.commit()
+        return row[0]
+    
+    def _get_similar(self, key, tiles, now):
+        """The response for the closest image within fuzzy_distance squares, from either tier"""
+        candidates = [(entry_tiles, response) for (entry_key, _), (response, created, entry_tiles)
+                      in self._memory.items() if entry_key == key and now - created <= self.ttl]
+        if self._db is not None:
+            candidates += self._db.execute(
+                "SELECT tiles, response FROM responses WHERE request_key = ? AND created >= ?",
+                (key, now - self.ttl)).fetchall()
+        best = None
+        for entry_tiles, response in candidates:
+            distance = self._distance(tiles, entry_tiles)
+            if distance is not None and distance <= self.fuzzy_distance and (best is None or distance < best[0]):
+                best = (distance, response)
+        return best[1] if best is not None else None
+    
+    def _evict_disk(self, now):
+        self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        evicted = 0
+        for entry_key, digest, size in self._db.execute(
+                "SELECT request_key, digest, size FROM responses ORDER BY accessed").fetchall():
+            if total <= self.max_disk_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE request_key = ? AND digest = ?",
+                             (entry_key, digest))
+            total -= size
+            evicted += 1
+        logging.debug("Evicted %d cached response(s) from disk", evicted)
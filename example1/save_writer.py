@@ -0,0 +1,107 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import logging
+import os
+import threading
+
+# name -> (extension, PIL format, save options); compress_level applies to PNG
+FORMATS = {
+    "png": (".png", "PNG", {}),
+    "webp": (".webp", "WEBP", {"lossless": True, "method": 0}),
+    # Uncompressed RGB behind a one-line header; the fastest thing to write
+    "ppm": (".ppm", "PPM", {}),
+}
+
+_reserved = set()
+_reserved_lock = threading.Lock()
+
+def unique_path(directory, extension, prefix="screenshot"):
+    """A new, collision-free file path with a microsecond timestamp
+    
+    Names handed out in this process are remembered, so two saves within
+    the same microsecond (or racing threads) still get distinct names.
+    """
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    with _reserved_lock:
+        candidate = os.path.join(directory, f"{prefix}_{stamp}{extension}")
+        n = 1
+        while candidate in _reserved or os.path.exists(candidate):
+            candidate = os.path.join(directory, f"{prefix}_{stamp}_{n}{extension}")
+            n += 1
+        _reserved.add(candidate)
+        return candidate
+
+def write_image(image, path, fmt="png", compress_level=1):
+    """Write image to path atomically: encode to a temp file, then rename"""
+    extension, pil_format, options = FORMATS[fmt]
+    if pil_format == "PNG":
+        options = dict(options, compress_level=compress_level)
+    if pil_format == "PPM" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    
+    tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        image.save(tmp, format=pil_format, **options)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    finally:
+        with _reserved_lock:
+            _reserved.discard(path)
+
+class SaveWriter:
+    """Saves images on a worker pool so the caller never blocks on encoding
+    
+    At most max_pending saves may be queued or running; submit() then
+    either waits for room (block=True) or returns None so the caller can
+    tell the user the save was not accepted.
+    """
+    
+    def __init__(self, directory="screenshots", fmt="png", compress_level=1,
+                 max_workers=2, max_pending=4):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+        self.directory = directory
+        self.fmt = fmt
+        self.compress_level = compress_level
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="save-writer")
+    
+    def submit(self, image, callback=None, block=False, timeout=None):
+        """Queue image for saving; returns a Future of the path, or None if full
+        
+        callback(path, error) runs on the worker thread when the save ends.
+        """
+        if not self._slots.acquire(blocking=block, timeout=timeout if block else None):
+            logging.warning("Save queue is full; dropping save request")
+            return None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = unique_path(self.directory, FORMATS[self.fmt][0])
+            future = self._executor.submit(self._save, image, path, callback)
+        except BaseException:
+            self._slots.release()
+            raise
+        return future
+    
+    def _save(self, image, path, callback):
+        error = None
+        try:
+            write_image(image, path, self.fmt, self.compress_level)
+            logging.info("Screenshot saved: %s", path)
+        except Exception as e:
+            logging.error(f"Error saving screenshot: {e}", exc_info=True)
+            error = e
+        finally:
+            self._slots.release()
+        if callback is not None:
+            callback(path, error)
+        if error is not None:
+            raise error
+        return path
+    
+    def close(self, wait=True):
+        """Finish (or with wait=False, abandon) queued saves"""
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
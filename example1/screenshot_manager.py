@@ -1,41 +1,159 @@
 from PIL import Image
 import mss
-import mss.tools
-from datetime import datetime
 import os
+import time
 import logging
+from . import tracing
+from .frame_diff import FrameDiffer
+from .trim import trim_image
+from .save_writer import FORMATS, unique_path, write_image
 
 class ScreenshotManager:
-    def __init__(self):
+    def __init__(self, session=None, history=None):
         self.screenshot = None
         self.original_screenshot = None
         self.cropped_image = None
+        # Optional CaptureSession; without one each capture opens its own mss handle
+        self.session = session
+        # Optional ImageHistory every capture is added to
+        self.history = history
+        self.last_entry = None
+        # Screen-space rectangle, monitor index and wall-clock time of the last capture
+        self.last_capture_area = None
+        self.last_capture_monitor = None
+        self.last_capture_time = None
+        # Seconds from trigger to pixels in memory for the last capture
+        self.last_capture_latency = None
     
-    def capture_screen(self):
-        """Capture the screen and return the image"""
-        logging.info("Starting screenshot capture")
+    def list_monitors(self):
+        """Return the physical monitors as mss dicts (index 1..N in capture_screen)"""
         try:
+            if self.session is not None:
+                return self.session.monitors[1:]
             with mss.mss() as sct:
-                # Capture entire screen
-                monitor = sct.monitors[0]
-                logging.debug(f"Monitor info: {monitor}")
-                screenshot = sct.grab(monitor)
-                logging.info(f"Screenshot captured: {screenshot.width}x{screenshot.height}")
-                
-                # Save screenshot to temporary file
-                temp_filename = "temp_screenshot.png"
-                logging.debug(f"Saving screenshot to: {temp_filename}")
-                mss.tools.to_png(screenshot.rgb, screenshot.size, output=temp_filename)
-                
-                # Load and return image
-                self.original_screenshot = Image.open(temp_filename)
-                os.remove(temp_filename)
-                return self.original_screenshot
-                
+                return sct.monitors[1:]
+        except Exception as e:
+            logging.error(f"Could not enumerate monitors: {e}", exc_info=True)
+            return []
+    
+    def capture_screen(self, monitor=0, region=None, triggered_at=None):
+        """Capture the screen and return the image
+        
+        monitor is an index into mss' monitor list (0 is the whole virtual
+        desktop, 1..N the physical screens). region, if given, is a
+        (left, top, width, height) rectangle in screen coordinates and takes
+        precedence; only those pixels are grabbed. triggered_at is the
+        time.perf_counter() of the user action, used for latency logging.
+        """
+        logging.info("Starting screenshot capture")
+        start = triggered_at if triggered_at is not None else time.perf_counter()
+        try:
+            with tracing.span("capture.grab"):
+                if self.session is not None:
+                    screenshot, area = self._grab(self.session.monitors, self.session.grab, monitor, region)
+                else:
+                    with mss.mss() as sct:
+                        screenshot, area = self._grab(sct.monitors, sct.grab, monitor, region)
+            if screenshot is None:
+                return None
+            logging.info("Screenshot captured: %dx%d", screenshot.width, screenshot.height)
+            
+            # Build the image straight from the raw BGRA buffer
+            with tracing.span("capture.convert"):
+                self.original_screenshot = self.to_image(screenshot)
+            self.last_capture_area = {
+                "left": area["left"], "top": area["top"],
+                "width": screenshot.width, "height": screenshot.height,
+            }
+            self.last_capture_monitor = None if region is not None else monitor
+            self.last_capture_time = time.time()
+            self.last_capture_latency = time.perf_counter() - start
+            tracing.record("capture.latency", self.last_capture_latency)
+            logging.info("Capture latency: %.1f ms", self.last_capture_latency * 1000)
+            if self.history is not None:
+                self.last_entry = self.history.add(
+                    self.original_screenshot, area=self.last_capture_area,
+                    monitor=self.last_capture_monitor, captured_at=self.last_capture_time)
+            return self.original_screenshot
+            
         except Exception as e:
             logging.error(f"Screenshot capture failed: {e}", exc_info=True)
             return None
     
+    def _grab(self, monitors, grab, monitor, region):
+        """Resolve the capture area and grab it with the given mss grab function"""
+        if region is not None:
+            area = self._clamp_region(region, monitors[0])
+            if area is None:
+                logging.error(f"Region {region} is outside the desktop")
+                return None, None
+        else:
+            area = monitors[monitor]
+        logging.debug("Capture area: %s", area)
+        return grab(area), area
+    
+    def watch(self, monitor=0, region=None, fps=2.0, min_changed=0.01,
+              pixel_threshold=24, block=16, max_frames=None):
+        """Capture continuously and yield only frames that changed
+        
+        Frames are grabbed at up to fps and diffed against the previous
+        grab; a FrameChange (image, dirty boxes, changed fraction) is
+        yielded when at least min_changed of the pixels moved. The first
+        frame is always yielded. Stops after max_frames grabs, or when the
+        caller closes the generator.
+        
+            for change in manager.watch(region=(0, 0, 800, 600), fps=4):
+                chat_manager.analyze_image(change.image)
+        """
+        differ = FrameDiffer(block=block, pixel_threshold=pixel_threshold, min_changed=min_changed)
+        interval = 1.0 / fps
+        next_grab = time.monotonic()
+        grabbed = 0
+        while max_frames is None or grabbed < max_frames:
+            image = self.capture_screen(monitor=monitor, region=region)
+            grabbed += 1
+            if image is not None:
+                change = differ.update(image, index=grabbed - 1)
+                if change is not None:
+                    logging.debug("Frame %d: %.2f%% changed, %d region(s)",
+                                  change.index, change.changed_fraction * 100, len(change.boxes))
+                    yield change
+            
+            # Fixed-rate schedule; if analysis fell behind, don't try to catch up
+            next_grab += interval
+            delay = next_grab - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_grab = time.monotonic()
+    
+    def capture_monitor(self, index):
+        """Capture a single physical monitor (1-based, as in list_monitors)"""
+        return self.capture_screen(monitor=index)
+    
+    def capture_region(self, left, top, width, height):
+        """Capture only the given screen rectangle"""
+        return self.capture_screen(region=(left, top, width, height))
+    
+    @staticmethod
+    def _clamp_region(region, desktop):
+        """Intersect a (left, top, width, height) region with the virtual desktop"""
+        left, top, width, height = region
+        x1 = max(left, desktop["left"])
+        y1 = max(top, desktop["top"])
+        x2 = min(left + width, desktop["left"] + desktop["width"])
+        y2 = min(top + height, desktop["top"] + desktop["height"])
+        if x2 <= x1 or y2 <= y1:
+            return None
+        return {"left": x1, "top": y1, "width": x2 - x1, "height": y2 - y1}
+    
+    @staticmethod
+    def to_image(screenshot):
+        """Convert an mss screenshot to a PIL image without touching disk"""
+        # mss hands back BGRA rows; the "BGRX" raw decoder swaps channels and
+        # drops alpha in a single pass, so no PNG encode/decode round trip
+        return Image.frombuffer("RGB", screenshot.size, screenshot.bgra, "raw", "BGRX", 0, 1)
+    
     def crop_image(self, image, box):
         """Crop image with given box coordinates"""
         try:
@@ -45,17 +163,26 @@ class ScreenshotManager:
             logging.error(f"Error cropping image: {e}", exc_info=True)
             return None
     
-    def save_screenshot(self, image, directory="screenshots"):
-        """Save the image to a file"""
+    def trim_image(self, image, **options):
+        """Trim uniform borders off image; returns a TrimResult or None on error"""
+        try:
+            result = trim_image(image, **options)
+            self.cropped_image = result.image
+            return result
+        except Exception as e:
+            logging.error(f"Error trimming image: {e}", exc_info=True)
+            return None
+    
+    def save_screenshot(self, image, directory="screenshots", fmt="png", compress_level=1):
+        """Save the image to a file (synchronously; see SaveWriter for background saves)"""
         try:
             if not os.path.exists(directory):
                 os.makedirs(directory)
             
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{directory}/screenshot_{timestamp}.png"
-            image.save(filename)
-            logging.info(f"Screenshot saved: {filename}")
+            filename = unique_path(directory, FORMATS[fmt][0])
+            write_image(image, filename, fmt, compress_level)
+            logging.info("Screenshot saved: %s", filename)
             return True
         except Exception as e:
             logging.error(f"Error saving screenshot: {e}", exc_info=True)
-            return False 
\ No newline at end of file
+            return False
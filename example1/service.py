@@ -0,0 +1,316 @@
+"""Headless capture-and-analyze service on localhost
+
+    example1 serve --port 8765
+
+    GET  /capture?monitor=0                          PNG of a monitor (0 = all)
+    GET  /capture/region?left=&top=&width=&height=   PNG of a screen rectangle
+    POST /analyze                                    capture (or upload) and analyze
+    GET  /stats                                      per-endpoint latency and queue state (JSON)
+    GET  /metrics                                    all tracing spans, Prometheus text
+
+POST /analyze takes either a JSON body ({"prompt": ..., "monitor": 0,
+"region": [left, top, width, height], "tiled": false, "trim": false}) or a
+raw image body with ?prompt=... and answers {"text": ..., "capture": {...}}.
+
+Every request needs "Authorization: Bearer <token>"; a random token is
+generated and printed at startup unless one is given. Requests must name
+localhost in their Host header (so a DNS-rebound page can't reach the
+service) and a JSON body must be sent as application/json (so a page
+can't post one as a form without a CORS preflight).
+
+One process keeps one capture session and one API client warm for every
+caller. Captures run on the request thread (the session serializes them);
+analyses go through a bounded queue drained by a few workers and are
+refused with 503 when it is full.
+"""
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import io
+import json
+import logging
+import queue
+import secrets
+import threading
+import time
+from PIL import Image, UnidentifiedImageError
+from . import tracing
+from .capture_session import CaptureSession
+from .chat_manager import ChatManager
+from .screenshot_manager import ScreenshotManager
+from .transport import DeadlineExceeded, NotConfigured, RateLimited, RequestTimedOut
+
+# HTTP status for an analysis that failed with these transport errors
+ERROR_STATUS = {NotConfigured: 503, RateLimited: 429, DeadlineExceeded: 504, RequestTimedOut: 504}
+
+DEFAULT_PORT = 8765
+
+# Host header names accepted, with or without a port
+ALLOWED_HOSTS = ("localhost", "127.0.0.1", "[::1]")
+
+class QueueFull(Exception):
+    """The analysis queue is at capacity"""
+
+class CaptureService:
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, workers=2, queue_size=8,
+                 timeout=300, token=None, store=None, backend=None, transport=None):
+        """workers: concurrent analyses; queue_size: analyses allowed to wait
+        
+        token must be sent as "Authorization: Bearer <token>"; a random one
+        is generated if not given (see self.token).
+        store: a ScreenshotStore to record analyses in (None for none).
+        backend: mss-compatible factory for the capture session (tests, benchmarks).
+        transport: a Transport for API calls instead of the one for the env API key.
+        """
+        self.timeout = timeout
+        self.token = token or secrets.token_urlsafe(32)
+        self.session = CaptureSession(backend=backend) if backend else CaptureSession()
+        self.screenshot_manager = ScreenshotManager(session=self.session)
+        self._capture_lock = threading.Lock()
+        # One warm client shared by every worker; each worker gets its own
+        # ChatManager since conversations are per-manager state
+        primary = ChatManager(store=store, transport=transport)
+        self._chat_managers = [primary] + [
+            ChatManager(cache=primary.cache or False, store=store, transport=primary.transport)
+            for _ in range(workers - 1)
+        ]
+        self._jobs = queue.Queue(maxsize=queue_size)
+        self.rejected = 0
+        self.completed = 0
+        self._workers = [threading.Thread(target=self._work, args=(chat,), name=f"analyze-{i}", daemon=True)
+                         for i, chat in enumerate(self._chat_managers)]
+        for worker in self._workers:
+            worker.start()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+    
+    @property
+    def address(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def serve_forever(self):
+        logging.info("Serving on %s", self.address)
+        self._server.serve_forever()
+    
+    def start(self):
+        """Serve on a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name="service", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        for _ in self._workers:
+            self._jobs.put(None)
+        for worker in self._workers:
+            worker.join()
+        for chat in self._chat_managers:
+            chat.close()
+        self.session.close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    def capture(self, monitor=0, region=None):
+        """Grab the screen; returns (image, metadata) or (None, None)"""
+        with self._capture_lock:
+            image = self.screenshot_manager.capture_screen(monitor=monitor, region=region)
+            if image is None:
+                return None, None
+            manager = self.screenshot_manager
+            return image, {
+                "area": manager.last_capture_area,
+                "monitor": manager.last_capture_monitor,
+                "captured_at": manager.last_capture_time,
+                "latency_ms": round(manager.last_capture_latency * 1000, 1),
+            }
+    
+    def submit(self, job):
+        """Queue job(chat_manager) for a worker; raises QueueFull when at capacity"""
+        future = Future()
+        try:
+            self._jobs.put_nowait((future, job))
+        except queue.Full:
+            self.rejected += 1
+            raise QueueFull()
+        return future
+    
+    def _work(self, chat):
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                return
+            future, job = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                with tracing.span("queue.job"):
+                    future.set_result(job(chat))
+                self.completed += 1
+            except Exception as e:
+                future.set_exception(e)
+    
+    def analyze(self, image, prompt=None, tiled=False, trim=False):
+        """Queue an analysis of image and return a Future for its AnalysisResult"""
+        def job(chat):
+            chat.auto_trim = trim
+            if not tiled:
+                return chat.analyze(image, prompt)
+            return chat.analyze_tiled(image, prompt)
+        return self.submit(job)
+    
+    def stats(self):
+        spans = tracing.snapshot()
+        return {
+            "endpoints": {name[len("service."):]: summary for name, summary in spans.items()
+                          if name.startswith("service.")},
+            "queue": {"waiting": self._jobs.qsize(), "capacity": self._jobs.maxsize,
+                      "workers": len(self._workers), "completed": self.completed, "rejected": self.rejected},
+        }
+    
+    def _handler(self):
+        service = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def log_message(self, format, *args):
+                logging.debug("%s %s", self.address_string(), format % args)
+            
+            def _send(self, status, data, content_type, headers=()):
+                self.send_response(status)
+                self.send_header("content-type", content_type)
+                self.send_header("content-length", str(len(data)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def _send_json(self, status, body, headers=()):
+                self._send(status, json.dumps(body).encode(), "application/json", headers)
+            
+            def _send_image(self, image, metadata):
+                buffered = io.BytesIO()
+                image.save(buffered, format="PNG", compress_level=1)
+                self._send(200, buffered.getvalue(), "image/png",
+                           [("x-capture", json.dumps(metadata))])
+            
+            def _authorized(self):
+                host = self.headers.get("host", "")
+                name = host.rsplit(":", 1)[0] if not host.endswith("]") else host
+                if name.lower() not in ALLOWED_HOSTS:
+                    self._send_json(403, {"error": f"host {host!r} not allowed"})
+                    return False
+                expected = f"Bearer {service.token}"
+                if secrets.compare_digest(self.headers.get("authorization", "").encode(), expected.encode()):
+                    return True
+                self._send_json(401, {"error": "missing or wrong bearer token"})
+                return False
+            
+            def _route(self, method):
+                url = urlparse(self.path)
+                query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                route = ROUTES.get((method, url.path.rstrip("/") or "/"))
+                if route is None:
+                    self._send_json(404, {"error": f"no route for {method} {url.path}"})
+                    return
+                if not self._authorized():
+                    return
+                name, handle = route
+                with tracing.span(f"service.{name}"):
+                    try:
+                        handle(self, query)
+                    except (KeyError, ValueError, TypeError) as e:
+                        self._send_json(400, {"error": f"bad request: {e}"})
+            
+            def do_GET(self):
+                self._route("GET")
+            
+            def do_POST(self):
+                self._route("POST")
+            
+            def capture(self, query):
+                image, metadata = service.capture(monitor=int(query.get("monitor", 0)))
+                if image is None:
+                    self._send_json(500, {"error": "capture failed"})
+                    return
+                self._send_image(image, metadata)
+            
+            def capture_region(self, query):
+                region = tuple(int(query[key]) for key in ("left", "top", "width", "height"))
+                image, metadata = service.capture(region=region)
+                if image is None:
+                    self._send_json(500, {"error": f"capture failed for region {region}"})
+                    return
+                self._send_image(image, metadata)
+            
+            def analyze(self, query):
+                body = self.rfile.read(int(self.headers.get("content-length", 0)))
+                content_type = self.headers.get("content-type", "").split(";")[0].strip().lower()
+                if content_type != "application/json" and not content_type.startswith("image/"):
+                    self._send_json(415, {"error": "send JSON as application/json or an image/* body"})
+                    return
+                if content_type.startswith("image/"):
+                    try:
+                        image = Image.open(io.BytesIO(body))
+                        image.load()
+                    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+                        self._send_json(400, {"error": f"bad image: {e}"})
+                        return
+                    request, metadata = dict(query), None
+                else:
+                    request = json.loads(body or b"{}")
+                    if not isinstance(request, dict):
+                        self._send_json(400, {"error": "bad request: the JSON body must be an object"})
+                        return
+                    region = request.get("region")
+                    if region is not None and (not isinstance(region, list) or len(region) != 4):
+                        self._send_json(400, {"error": "bad request: region must be [left, top, width, height]"})
+                        return
+                    image, metadata = service.capture(monitor=int(request.get("monitor", 0)),
+                                                      region=tuple(int(v) for v in region) if region else None)
+                    if image is None:
+                        self._send_json(500, {"error": "capture failed"})
+                        return
+                
+                start = time.perf_counter()
+                try:
+                    future = service.analyze(image, request.get("prompt"),
+                                             tiled=bool(request.get("tiled")), trim=bool(request.get("trim")))
+                except QueueFull:
+                    self._send_json(503, {"error": "analysis queue is full"}, [("retry-after", "5")])
+                    return
+                try:
+                    result = future.result(timeout=service.timeout)
+                except FutureTimeout:
+                    future.cancel()
+                    self._send_json(504, {"error": f"analysis took longer than {service.timeout}s"})
+                    return
+                body = {"text": result.text, "capture": metadata, "attempts": result.attempts,
+                        "cached": result.cached, "latency_ms": round((time.perf_counter() - start) * 1000, 1)}
+                if result.ok:
+                    self._send_json(200, body)
+                    return
+                body.update(error=str(result.error), error_type=type(result.error).__name__)
+                self._send_json(ERROR_STATUS.get(type(result.error), 502), body)
+            
+            def stats(self, query):
+                self._send_json(200, service.stats())
+            
+            def metrics(self, query):
+                self._send(200, tracing.export_prometheus().encode(), "text/plain; version=0.0.4")
+        
+        ROUTES = {
+            ("GET", "/capture"): ("capture", Handler.capture),
+            ("GET", "/capture/region"): ("capture_region", Handler.capture_region),
+            ("POST", "/analyze"): ("analyze", Handler.analyze),
+            ("GET", "/stats"): ("stats", Handler.stats),
+            ("GET", "/metrics"): ("metrics", Handler.metrics),
+        }
+        return Handler
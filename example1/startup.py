@@ -0,0 +1,54 @@
+"""Startup milestones and the --startup-report summary
+
+Milestones are measured from the moment example1.main was imported and
+also recorded as "startup.<name>" spans in tracing. For a per-module
+breakdown of import cost run `python -X importtime -m example1.main`.
+"""
+import logging
+import sys
+import threading
+import time
+from . import tracing
+
+STARTED = time.perf_counter()
+
+# Modules whose import dominates cold start; the report shows which of them
+# were already loaded at each milestone
+HEAVY_MODULES = ("PIL.Image", "numpy", "mss", "anthropic", "httpx")
+
+# The report is printed once all of these have been reached
+REPORT_AFTER = ("first_paint", "capture_ready", "chat_ready")
+
+_marks = []
+_lock = threading.Lock()
+_report_enabled = False
+_reported = False
+
+def enable_report():
+    """Print the startup summary to stderr once REPORT_AFTER are all reached"""
+    global _report_enabled
+    _report_enabled = True
+
+def mark(name):
+    """Record that startup reached the named milestone"""
+    global _reported
+    elapsed = time.perf_counter() - STARTED
+    loaded = [module for module in HEAVY_MODULES if module in sys.modules]
+    tracing.record(f"startup.{name}", elapsed)
+    logging.info("Startup: %s after %.0f ms", name, elapsed * 1000)
+    with _lock:
+        _marks.append((name, elapsed, threading.current_thread().name, loaded))
+        reached = {m[0] for m in _marks}
+        due = _report_enabled and not _reported and reached.issuperset(REPORT_AFTER)
+        _reported = _reported or due
+    if due:
+        print(report(), file=sys.stderr)
+
+def report():
+    """Milestones in order, with the thread and the heavy modules loaded by then"""
+    with _lock:
+        marks = sorted(_marks, key=lambda m: m[1])
+    lines = [f"{'milestone':<16} {'ms':>7}  {'thread':<12} heavy modules loaded"]
+    for name, elapsed, thread, loaded in marks:
+        lines.append(f"{name:<16} {elapsed * 1000:>7.0f}  {thread[:12]:<12} {', '.join(loaded) or '-'}")
+    return "\n".join(lines)
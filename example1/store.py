@@ -0,0 +1,188 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from .save_writer import write_image
+
+DEFAULT_STORE_DIR = "screenshots"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    sha256 TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY,
+    image_sha256 TEXT NOT NULL REFERENCES images (sha256),
+    captured_at REAL NOT NULL,
+    monitor INTEGER,
+    region TEXT
+);
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY,
+    image_sha256 TEXT NOT NULL REFERENCES images (sha256),
+    prompt TEXT NOT NULL,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS captures_image ON captures (image_sha256);
+CREATE INDEX IF NOT EXISTS analyses_image ON analyses (image_sha256);
+"""
+
+# External-content FTS5 index over analyses, kept in sync by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS analyses_fts USING fts5(
+    prompt, response, content='analyses', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS analyses_ai AFTER INSERT ON analyses BEGIN
+    INSERT INTO analyses_fts (rowid, prompt, response) VALUES (new.id, new.prompt, new.response);
+END;
+CREATE TRIGGER IF NOT EXISTS analyses_ad AFTER DELETE ON analyses BEGIN
+    INSERT INTO analyses_fts (analyses_fts, rowid, prompt, response)
+    VALUES ('delete', old.id, old.prompt, old.response);
+END;
+"""
+
+def image_digest(image):
+    """SHA-256 of the decoded pixels, so re-encodes of the same frame match"""
+    digest = hashlib.sha256(f"{image.mode}:{image.width}x{image.height}:".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+class ScreenshotStore:
+    """SQLite index of captured images and their analyses
+    
+    Images are content-hashed and written once under objects/ (or
+    recorded at an existing saved path). Captures add metadata rows
+    pointing at the image; analyses are full-text indexed with FTS5 so
+    past answers can be searched without asking the API again.
+    """
+    
+    def __init__(self, directory=DEFAULT_STORE_DIR):
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(directory, "index.sqlite3"), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        try:
+            self._db.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError as e:
+            logging.warning(f"SQLite has no FTS5 ({e}); search falls back to LIKE scans")
+            self.fts = False
+        self._db.commit()
+        self._lock = threading.RLock()
+        # Last hashed image, since analyses of one screenshot arrive in a row
+        self._memo = (None, None)
+    
+    def _digest(self, image):
+        ref, digest = self._memo
+        if ref is not None and ref() is image:
+            return digest
+        digest = image_digest(image)
+        self._memo = (weakref.ref(image), digest)
+        return digest
+    
+    def add_image(self, image, saved_path=None):
+        """Store image once by content hash and return the hash
+        
+        If saved_path is given and the image is new, that file is recorded
+        instead of writing another copy.
+        """
+        digest = self._digest(image)
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM images WHERE sha256 = ?", (digest,)).fetchone():
+                return digest
+            path = saved_path
+            if path is None:
+                path = os.path.join(self.objects_dir, digest[:2], f"{digest}.png")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                write_image(image, path)
+            self._db.execute("INSERT INTO images VALUES (?, ?, ?, ?, ?)",
+                             (digest, path, image.width, image.height, time.time()))
+            self._db.commit()
+            return digest
+    
+    def add_capture(self, image, monitor=None, region=None, captured_at=None, saved_path=None):
+        """Record a capture with its metadata; returns the capture id"""
+        digest = self.add_image(image, saved_path)
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO captures (image_sha256, captured_at, monitor, region) VALUES (?, ?, ?, ?)",
+                (digest, captured_at or time.time(), monitor,
+                 json.dumps(list(region)) if region is not None else None))
+            self._db.commit()
+            return cursor.lastrowid
+    
+    def add_analysis(self, image, prompt, model, response):
+        """Record an analysis of image; returns the analysis id"""
+        digest = self.add_image(image)
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO analyses (image_sha256, prompt, model, response, created) VALUES (?, ?, ?, ?, ?)",
+                (digest, prompt, model, response, time.time()))
+            self._db.commit()
+            return cursor.lastrowid
+    
+    def analyses_for(self, image):
+        """Earlier analyses of exactly this image, newest first"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM analyses WHERE image_sha256 = ? ORDER BY created DESC",
+                (self._digest(image),)).fetchall()
+        return [dict(row) for row in rows]
+    
+    def search(self, query, limit=20):
+        """Full-text search over prompts and responses, best match first
+        
+        query uses FTS5 syntax ("error AND timeout", "conn*", ...). Each
+        result carries the analysis, the image path and a snippet.
+        """
+        with self._lock:
+            if self.fts:
+                try:
+                    rows = self._match(query, limit)
+                except sqlite3.OperationalError:
+                    # Not valid FTS5 syntax (e.g. "time-out"); search it as a phrase
+                    rows = self._match('"' + query.replace('"', '""') + '"', limit)
+            else:
+                pattern = f"%{query}%"
+                rows = self._db.execute("""
+                    SELECT a.id, a.prompt, a.response, a.model, a.created, a.image_sha256, i.path,
+                           substr(a.response, 1, 80) AS snippet
+                    FROM analyses a JOIN images i ON i.sha256 = a.image_sha256
+                    WHERE a.prompt LIKE ? OR a.response LIKE ?
+                    ORDER BY a.created DESC
+                    LIMIT ?""", (pattern, pattern, limit)).fetchall()
+        return [dict(row) for row in rows]
+    
+    def _match(self, query, limit):
+        return self._db.execute("""
+            SELECT a.id, a.prompt, a.response, a.model, a.created, a.image_sha256, i.path,
+                   snippet(analyses_fts, 1, '[', ']', '...', 12) AS snippet
+            FROM analyses_fts
+            JOIN analyses a ON a.id = analyses_fts.rowid
+            JOIN images i ON i.sha256 = a.image_sha256
+            WHERE analyses_fts MATCH ?
+            ORDER BY bm25(analyses_fts)
+            LIMIT ?""", (query, limit)).fetchall()
+    
+    def stats(self):
+        """Row counts for images, captures and analyses"""
+        with self._lock:
+            return {table: self._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                    for table in ("images", "captures", "analyses")}
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
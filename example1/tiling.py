@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+import math
+from .payload import MAX_PIXELS
+
+# Largest square the model takes without downsampling (~1.15 MP)
+TILE_SIZE = int(math.sqrt(MAX_PIXELS))
+# Shared strip between neighbouring tiles, a few text lines tall, so a line
+# cut by one tile's edge is whole in the next
+TILE_OVERLAP = 96
+
+@dataclass
+class Tile:
+    """One piece of a tiled image"""
+    index: int
+    row: int
+    col: int
+    # (left, top, right, bottom) in the full image
+    box: tuple
+    
+    @property
+    def label(self):
+        left, top, right, bottom = self.box
+        return f"tile r{self.row + 1}c{self.col + 1} (x {left}-{right}, y {top}-{bottom})"
+
+def _starts(length, tile, overlap):
+    """Evenly spaced tile offsets covering length with at least overlap shared"""
+    if length <= tile:
+        return [0]
+    count = math.ceil((length - overlap) / (tile - overlap))
+    step = (length - tile) / (count - 1)
+    return [round(i * step) for i in range(count)]
+
+def tile_grid(width, height, tile_size=TILE_SIZE, overlap=TILE_OVERLAP):
+    """Overlapping tiles of at most tile_size x tile_size covering the image, row by row"""
+    tiles = []
+    for row, top in enumerate(_starts(height, tile_size, overlap)):
+        for col, left in enumerate(_starts(width, tile_size, overlap)):
+            box = (left, top, min(width, left + tile_size), min(height, top + tile_size))
+            tiles.append(Tile(len(tiles), row, col, box))
+    return tiles
+
+def tile_prompt(prompt, tile, grid, size):
+    """The question for one tile, telling the model where the tile sits"""
+    rows = grid[-1].row + 1
+    cols = grid[-1].col + 1
+    return (f"This image is one tile of a {size[0]}x{size[1]} screenshot split into a "
+            f"{rows}x{cols} grid of overlapping tiles: {tile.label}. "
+            f"Answer only about what is visible in this tile, and say nothing if it is empty.\n\n{prompt}")
+
+def merge_answers(grid, answers, size):
+    """One response with each tile's answer under its grid position and pixel box"""
+    sections = [f"Tiled analysis of a {size[0]}x{size[1]} screenshot in {len(grid)} tiles."]
+    for tile, answer in zip(grid, answers):
+        sections.append(f"[{tile.label}]\n{answer.strip()}")
+    return "\n\n".join(sections)
@@ -0,0 +1,156 @@
+"""Timing spans, latency histograms and profiling hooks
+
+Every stage of a capture or analysis runs inside span("stage.name"); the
+durations feed in-process histograms that can be read with snapshot() or
+exported as JSON or Prometheus text. Set EXAMPLE1_METRICS to a file path
+(*.json or *.prom) to have them written on exit, and EXAMPLE1_PROFILE to a
+path to cProfile the next analysis into it.
+"""
+from collections import deque
+from contextlib import contextmanager
+import atexit
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+
+# Recent samples kept per span for percentile estimates
+RESERVOIR_SIZE = 2048
+QUANTILES = (0.5, 0.95, 0.99)
+
+class Histogram:
+    """Count, sum and max of all samples plus a window of recent ones"""
+    
+    def __init__(self, size=RESERVOIR_SIZE):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+    
+    def record(self, value):
+        with self._lock:
+            self.samples.append(value)
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+    
+    def quantile(self, q, ordered=None):
+        if ordered is None:
+            with self._lock:
+                ordered = sorted(self.samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    
+    def summary(self):
+        with self._lock:
+            ordered = sorted(self.samples)
+            count, total, peak = self.count, self.total, self.max
+        summary = {"count": count, "sum": total, "mean": total / count if count else 0.0, "max": peak}
+        for q in QUANTILES:
+            summary[f"p{int(q * 100)}"] = self.quantile(q, ordered)
+        return summary
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+def histogram(name):
+    """The histogram for a span name, created on first use"""
+    found = _histograms.get(name)
+    if found is None:
+        with _histograms_lock:
+            found = _histograms.setdefault(name, Histogram())
+    return found
+
+def record(name, seconds):
+    """Add a duration measured elsewhere"""
+    histogram(name).record(seconds)
+
+@contextmanager
+def span(name):
+    """Time the enclosed block into the named histogram"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram(name).record(time.perf_counter() - start)
+
+def snapshot():
+    """Summary (count, sum, mean, max, p50/p95/p99 in seconds) per span"""
+    with _histograms_lock:
+        names = sorted(_histograms)
+    return {name: _histograms[name].summary() for name in names}
+
+def reset():
+    """Forget all recorded spans"""
+    with _histograms_lock:
+        _histograms.clear()
+
+def export_json():
+    return json.dumps(snapshot(), indent=2)
+
+def export_prometheus(metric="example1_span_seconds"):
+    """Snapshot in the Prometheus text exposition format, as a summary"""
+    lines = [f"# HELP {metric} Duration of example1 pipeline stages.", f"# TYPE {metric} summary"]
+    for name, summary in snapshot().items():
+        for q in QUANTILES:
+            lines.append(f'{metric}{{span="{name}",quantile="{q}"}} {summary[f"p{int(q * 100)}"]:.6f}')
+        lines.append(f'{metric}_sum{{span="{name}"}} {summary["sum"]:.6f}')
+        lines.append(f'{metric}_count{{span="{name}"}} {summary["count"]}')
+    return "\n".join(lines) + "\n"
+
+def write_metrics(path):
+    """Write the snapshot to path, as Prometheus text for *.prom and JSON otherwise"""
+    text = export_prometheus() if path.endswith(".prom") else export_json()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    logging.info("Metrics written to %s", path)
+
+_configured = False
+_profile_lock = threading.Lock()
+_profile_done = False
+
+@contextmanager
+def profile_once(label):
+    """cProfile the first block run under this hook if EXAMPLE1_PROFILE is set
+    
+    The stats are dumped to the EXAMPLE1_PROFILE path (open with pstats or
+    snakeviz). Only the calling thread is profiled, and only once per run.
+    """
+    global _profile_done
+    path = os.getenv("EXAMPLE1_PROFILE")
+    with _profile_lock:
+        active = bool(path) and not _profile_done
+        _profile_done = _profile_done or active
+    if not active:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        logging.info("Profile of %s written to %s", label, path)
+
+def configure_logging(level=None):
+    """Set up logging once, at startup, rather than at import time
+    
+    The level comes from the argument, then EXAMPLE1_LOG_LEVEL, then INFO.
+    Also registers the EXAMPLE1_METRICS exit hook.
+    """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+    level = level or os.getenv("EXAMPLE1_LOG_LEVEL", "INFO")
+    logging.basicConfig(level=level.upper() if isinstance(level, str) else level,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    metrics_path = os.getenv("EXAMPLE1_METRICS")
+    if metrics_path:
+        atexit.register(write_metrics, metrics_path)
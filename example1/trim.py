@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+from PIL import Image
+import numpy as np
+import logging
+from . import tracing
+
+# Long edge of the copy the projections are computed on; plenty to find
+# margins a few pixels wide without scanning every source pixel
+ANALYSIS_LONG_EDGE = 1024
+
+@dataclass
+class TrimResult:
+    """A trimmed image and where it sits in the original"""
+    image: Image.Image
+    # (left, top, right, bottom) of image in source coordinates
+    box: tuple
+    source_size: tuple
+    
+    @property
+    def trimmed(self):
+        return self.box != (0, 0) + tuple(self.source_size)
+    
+    @property
+    def kept_fraction(self):
+        left, top, right, bottom = self.box
+        return (right - left) * (bottom - top) / (self.source_size[0] * self.source_size[1])
+    
+    def to_source(self, x, y):
+        """Map a point in the trimmed image back to the original"""
+        return x + self.box[0], y + self.box[1]
+
+def content_box(image, tolerance=12, min_fraction=0.002, margin=8):
+    """Bounding box of the detailed part of image, or None if it is all flat
+    
+    Pixels that differ from a neighbour by more than tolerance (in any
+    channel) count as detail; uniform backgrounds and smooth wallpaper
+    gradients have none. Row and column projections of that edge mask give
+    the first and last lines holding at least min_fraction detail, and the
+    box is grown by margin source pixels so content isn't cut flush.
+    """
+    factor = max(1, -(-max(image.size) // ANALYSIS_LONG_EDGE))
+    small = image.reduce(factor) if factor > 1 else image
+    
+    # One contiguous plane per channel; element-wise ops on those are much
+    # faster than reducing over an interleaved channel axis
+    horizontal = np.zeros((small.height, small.width - 1), dtype=bool)
+    vertical = np.zeros((small.height - 1, small.width), dtype=bool)
+    for band in small.convert("RGB").split():
+        plane = np.asarray(band, dtype=np.int16)
+        horizontal |= np.abs(plane[:, 1:] - plane[:, :-1]) > tolerance
+        vertical |= np.abs(plane[1:] - plane[:-1]) > tolerance
+    
+    rows = np.zeros(small.height)
+    rows += horizontal.sum(axis=1)
+    rows[1:] += vertical.sum(axis=1)
+    cols = np.zeros(small.width)
+    cols[1:] += horizontal.sum(axis=0)
+    cols += vertical.sum(axis=0)
+    
+    busy_rows = np.flatnonzero(rows > min_fraction * small.width)
+    busy_cols = np.flatnonzero(cols > min_fraction * small.height)
+    if busy_rows.size == 0 or busy_cols.size == 0:
+        return None
+    # Back to source pixels; a reduced pixel covers factor source pixels
+    return (
+        max(0, int(busy_cols[0]) * factor - margin),
+        max(0, int(busy_rows[0]) * factor - margin),
+        min(image.width, (int(busy_cols[-1]) + 1) * factor + margin),
+        min(image.height, (int(busy_rows[-1]) + 1) * factor + margin),
+    )
+
+def trim_image(image, tolerance=12, min_fraction=0.002, margin=8, min_saving=0.05):
+    """Cut uniform borders and empty margins off image
+    
+    Returns a TrimResult; the image is returned whole (box covering all of
+    it) when trimming would remove less than min_saving of the area or the
+    image has no detail at all.
+    """
+    with tracing.span("trim.detect"):
+        box = content_box(image, tolerance, min_fraction, margin)
+    full = (0, 0, image.width, image.height)
+    if box is None:
+        return TrimResult(image, full, image.size)
+    result = TrimResult(image.crop(box), box, image.size)
+    if 1 - result.kept_fraction < min_saving:
+        return TrimResult(image, full, image.size)
+    logging.info("Trimmed %dx%d to %dx%d at %s (%.0f%% of the area kept)",
+                 image.width, image.height, result.image.width, result.image.height,
+                 box[:2], result.kept_fraction * 100)
+    return result
@@ -1,36 +1,205 @@
 import tkinter as tk
 from tkinter import ttk
+from concurrent.futures import ThreadPoolExecutor
 import logging
-import os
-from .screenshot_manager import ScreenshotManager
-from .chat_manager import ChatManager
+import queue
+import threading
+import time
+from .chat_log import ChatLog
+from .chat_view import ChatView
+from .crop_view import CropView
+from .hotkey import GlobalHotkey
+from .save_writer import SaveWriter
+from .store import ScreenshotStore
+from . import startup
+from . import tracing
 
 class ScreenshotUI:
+    # Global shortcut for an instant capture (pynput notation)
+    CAPTURE_HOTKEY = "<ctrl>+<shift>+s"
+    # Time given to the window manager to unmap our window before grabbing
+    HIDE_SETTLE_MS = 30
+    # How often streamed response text is flushed into the chat panel
+    STREAM_FLUSH_MS = 50
+    # Quiet period after the last canvas resize before re-rendering the preview
+    RESIZE_DEBOUNCE_MS = 80
+    # How often the Tk thread checks on modules loading in the background
+    LOAD_POLL_MS = 20
+    # How often finished saves are checked for while any are pending
+    SAVE_POLL_MS = 100
+    # Chat messages kept in the Text widget, and how many are paged in from
+    # the on-disk chat log at a time when scrolling past either end
+    CHAT_WINDOW = 200
+    CHAT_PAGE = 50
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Screenshot OCR")
         logging.info("Initializing ScreenshotUI")
         
-        # Initialize managers
-        self.screenshot_manager = ScreenshotManager()
-        self.chat_manager = ChatManager()
+        # mss, Pillow, numpy and anthropic are imported on a background
+        # thread once the window is up; the properties below wait for them
+        # if they are used first
+        self._loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="startup")
+        self._capture_ready = None
+        self._chat_ready = None
+        self.capture_session = None
+        self._screenshot_manager = None
+        self._preview_renderer = None
+        self._chat_manager = None
+        # Why the API client couldn't be loaded; analysis stays disabled
+        self._chat_error = None
+        # A ChatManager stream is being shown in the chat panel
+        self.streaming = False
+        # Recent captures within a memory budget, older ones spilled to disk
+        self.history = None
+        self.history_entry = None
+        # Index of captures and analyses, searchable with `example1 search`
+        self.store = ScreenshotStore()
+        # Every chat message, appended to disk; the panel shows a window of it
+        self.chat_log = ChatLog()
+        # Encodes and writes saves off the Tk thread; their results come
+        # back through a queue the Tk thread polls while saves are pending
+        self.save_writer = SaveWriter()
+        self._save_results = queue.Queue()
+        self._saves_pending = 0
         
         # UI state variables
         self.photo_image = None
+        self._resize_job = None
         self.crop_start_x = None
         self.crop_start_y = None
         self.crop_rect = None
-        self.current_image = None
+        # Lazy crop over the last capture; pixels are only copied on save/analyze
+        self.current_view = None
+        # Screen coordinates of the captured image's top-left corner
+        self.capture_origin = (0, 0)
+        self.capture_monitor = None
+        self.captured_at = None
+        # Last crop as a (left, top, width, height) screen rectangle
+        self.last_region = None
+        self.capturing = False
         
         self._setup_window()
         self._create_widgets()
+        startup.mark("ui_built")
         
+        self.hotkey = GlobalHotkey(self.root, self.CAPTURE_HOTKEY, self.take_screenshot)
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.root.after_idle(self._on_first_idle)
+    
+    def _on_first_idle(self):
+        """Draw the window, then start loading everything it doesn't need to appear"""
+        self.root.update_idletasks()
+        startup.mark("first_paint")
+        self._start_loading()
+        # Tk calls from the loader thread could deadlock against a Tk thread
+        # waiting on it, so completion is polled from here instead
+        self._after_load = [(self._capture_ready, self._fill_monitor_choices, None),
+                            (self._chat_ready, self._on_chat_ready, self._on_chat_failed)]
+        self.root.after(self.LOAD_POLL_MS, self._poll_loading)
+        self.hotkey.start()
+    
+    def _start_loading(self):
+        if self._capture_ready is None:
+            self._capture_ready = self._loader.submit(self._load_capture)
+            self._chat_ready = self._loader.submit(self._load_chat)
+    
+    def _poll_loading(self):
+        """Finish the UI setup of each background load once it is done"""
+        waiting = []
+        for future, callback, on_error in self._after_load:
+            if not future.done():
+                waiting.append((future, callback, on_error))
+            elif future.exception() is not None:
+                logging.error(f"Background load failed: {future.exception()}", exc_info=future.exception())
+                if on_error is not None:
+                    on_error(future.exception())
+            else:
+                callback()
+        self._after_load = waiting
+        if waiting:
+            self.root.after(self.LOAD_POLL_MS, self._poll_loading)
+    
+    def _load_capture(self):
+        """Open the capture session and the preview renderer (background thread)"""
+        from .capture_session import CaptureSession
+        from .image_history import ImageHistory
+        from .preview import PreviewRenderer
+        from .screenshot_manager import ScreenshotManager
+        
+        # Keep one mss handle warm for the life of the window
+        try:
+            self.capture_session = CaptureSession()
+        except Exception as e:
+            logging.warning(f"Capture session unavailable, capturing without it: {e}")
+            self.capture_session = None
+        self.history = ImageHistory()
+        self._screenshot_manager = ScreenshotManager(session=self.capture_session, history=self.history)
+        self._preview_renderer = PreviewRenderer()
+        startup.mark("capture_ready")
+    
+    def _load_chat(self):
+        """Import the API client and create the chat manager (background thread)"""
+        from .chat_manager import ChatManager
+        
+        self._chat_manager = ChatManager(store=self.store)
+        # Index the chat log here rather than on the Tk thread
+        len(self.chat_log)
+        startup.mark("chat_ready")
+    
+    def _wait_for(self, future_name):
+        self._start_loading()
+        getattr(self, future_name).result()
+    
+    @property
+    def screenshot_manager(self):
+        if self._screenshot_manager is None:
+            self._wait_for("_capture_ready")
+        return self._screenshot_manager
+    
+    @property
+    def preview_renderer(self):
+        if self._preview_renderer is None:
+            self._wait_for("_capture_ready")
+        return self._preview_renderer
+    
+    @property
+    def chat_manager(self):
+        if self._chat_manager is None:
+            self._wait_for("_chat_ready")
+        return self._chat_manager
+    
+    def _on_chat_ready(self):
+        self.chat_view.show_latest()
+        self._check_api_key()
+    
+    def _on_chat_failed(self, error):
+        """Say once why analysis is unavailable and keep its controls disabled"""
+        self._chat_error = error
+        self.analyze_btn.config(state='disabled')
+        self.followup_entry.config(state='disabled')
+        self.ask_btn.config(state='disabled')
+        # A stream started before the load finished reports the error itself
+        if not self.streaming:
+            self.chat_view.show_latest()
+            self.chat_view.add("status", f"Analysis is unavailable: the API client could not be loaded ({error})")
+    
+    def _check_api_key(self):
         # Only show API key dialog if not properly initialized
         if not self.chat_manager.is_initialized():
             logging.warning("Chat manager not initialized from environment, requesting API key")
             self._request_api_key()
         else:
             logging.info("Chat manager successfully initialized from environment")
+    
+    def _fill_monitor_choices(self):
+        """Add one entry per physical monitor once mss has enumerated them"""
+        monitors = self.screenshot_manager.list_monitors()
+        self.monitor_choices = ["All monitors"] + [
+            f"Monitor {i} ({m['width']}x{m['height']})" for i, m in enumerate(monitors, start=1)
+        ]
+        self.monitor_combo.config(values=self.monitor_choices)
         
     def _setup_window(self):
         """Setup window properties"""
@@ -97,21 +266,68 @@ class ScreenshotUI:
         self.right_frame.rowconfigure(1, weight=1)  # Make chat area expandable
         
         # Screenshot section
-        self.screenshot_btn = ttk.Button(self.left_frame, text="Take Screenshot", command=self.take_screenshot)
-        self.screenshot_btn.grid(row=0, column=0, pady=10)
-        
-        # Preview canvas
+        capture_frame = ttk.Frame(self.left_frame)
+        capture_frame.grid(row=0, column=0, pady=10)
+        
+        # Filled in by _fill_monitor_choices once the capture backend is loaded
+        self.monitor_choices = ["All monitors"]
+        self.monitor_var = tk.StringVar(value=self.monitor_choices[0])
+        self.monitor_combo = ttk.Combobox(capture_frame, textvariable=self.monitor_var,
+                                          values=self.monitor_choices, state='readonly', width=22)
+        self.monitor_combo.grid(row=0, column=0, padx=5)
+        
+        self.screenshot_btn = ttk.Button(capture_frame, text="Take Screenshot", command=self.take_screenshot)
+        self.screenshot_btn.grid(row=0, column=1, padx=5)
+        
+        # Re-grabs only the last cropped screen area
+        self.recapture_btn = ttk.Button(capture_frame, text="Recapture Region",
+                                        command=self.recapture_region, state='disabled')
+        self.recapture_btn.grid(row=0, column=2, padx=5)
+        
+        # Step through earlier captures; spilled ones are read back from disk
+        self.older_btn = ttk.Button(capture_frame, text="<", width=3, command=self.show_older, state='disabled')
+        self.older_btn.grid(row=0, column=3, padx=(5, 0))
+        self.newer_btn = ttk.Button(capture_frame, text=">", width=3, command=self.show_newer, state='disabled')
+        self.newer_btn.grid(row=0, column=4)
+        self.root.bind("<Alt-Left>", lambda event: self.show_older())
+        self.root.bind("<Alt-Right>", lambda event: self.show_newer())
+        
+        # Preview canvas; grows with the window and re-renders on resize
         self.canvas = tk.Canvas(self.left_frame, bg='white', width=500, height=400)
-        self.canvas.grid(row=1, column=0, pady=10)
+        self.canvas.grid(row=1, column=0, pady=10, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.left_frame.rowconfigure(1, weight=1)
+        self.canvas.bind("<Configure>", self._on_canvas_resize)
+        
+        # Crop, undo and redo buttons
+        edit_frame = ttk.Frame(self.left_frame)
+        edit_frame.grid(row=2, column=0, pady=10)
+        
+        self.crop_btn = ttk.Button(edit_frame, text="Crop Screenshot", command=self.start_crop, state='disabled')
+        self.crop_btn.grid(row=0, column=0, padx=5)
+        
+        self.undo_btn = ttk.Button(edit_frame, text="Undo Crop", command=self.undo_crop, state='disabled')
+        self.undo_btn.grid(row=0, column=1, padx=5)
         
-        # Crop button
-        self.crop_btn = ttk.Button(self.left_frame, text="Crop Screenshot", command=self.start_crop, state='disabled')
-        self.crop_btn.grid(row=2, column=0, pady=10)
+        self.redo_btn = ttk.Button(edit_frame, text="Redo Crop", command=self.redo_crop, state='disabled')
+        self.redo_btn.grid(row=0, column=2, padx=5)
+        
+        # Cut empty margins off what gets sent, without touching the preview
+        self.auto_trim_var = tk.BooleanVar(value=True)
+        self.auto_trim_check = ttk.Checkbutton(edit_frame, text="Auto-trim margins", variable=self.auto_trim_var)
+        self.auto_trim_check.grid(row=0, column=3, padx=5)
+        
+        # Not while typing a question: the keys belong to the text there
+        self.root.bind("<Control-z>", lambda event: self._unless_typing(self.undo_crop))
+        self.root.bind("<Control-y>", lambda event: self._unless_typing(self.redo_crop))
         
         # Save button
         self.save_btn = ttk.Button(self.left_frame, text="Save Screenshot", command=self.save_screenshot, state='disabled')
         self.save_btn.grid(row=3, column=0, pady=10)
         
+        # Which capture is shown and how much memory the history is using
+        self.history_label = ttk.Label(self.left_frame, text="")
+        self.history_label.grid(row=4, column=0)
+        
         # Chat section
         chat_label = ttk.Label(self.right_frame, text="Chat")
         chat_label.grid(row=0, column=0, pady=5)
@@ -124,7 +340,9 @@ class ScreenshotUI:
         
         self.chat_text = tk.Text(chat_frame, width=30, height=20, wrap=tk.WORD)
         scrollbar = ttk.Scrollbar(chat_frame, orient="vertical", command=self.chat_text.yview)
-        self.chat_text.configure(yscrollcommand=scrollbar.set)
+        # Keeps the widget to CHAT_WINDOW messages, paging the rest from the chat log
+        self.chat_view = ChatView(self.chat_text, scrollbar, self.chat_log,
+                                  window=self.CHAT_WINDOW, page=self.CHAT_PAGE)
         
         self.chat_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
@@ -134,84 +352,187 @@ class ScreenshotUI:
                                     command=self.analyze_screenshot, state='disabled')
         self.analyze_btn.grid(row=2, column=0, pady=10)
         
+        # Follow-up questions about the analyzed screenshot
+        followup_frame = ttk.Frame(self.right_frame)
+        followup_frame.grid(row=3, column=0, sticky=(tk.W, tk.E))
+        followup_frame.columnconfigure(0, weight=1)
+        
+        self.followup_var = tk.StringVar()
+        self.followup_entry = ttk.Entry(followup_frame, textvariable=self.followup_var, state='disabled')
+        self.followup_entry.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 5))
+        self.followup_entry.bind("<Return>", lambda event: self.ask_followup())
+        
+        self.ask_btn = ttk.Button(followup_frame, text="Ask", command=self.ask_followup, state='disabled')
+        self.ask_btn.grid(row=0, column=1)
+        
         # Configure grid weights for resizing
         self.root.columnconfigure(0, weight=2)
         self.root.columnconfigure(1, weight=1)
         self.root.rowconfigure(0, weight=1)
         
-        # Update preview dimensions
+        # Preview size until the canvas has been laid out
         self.PREVIEW_WIDTH = 500
         self.PREVIEW_HEIGHT = 400
     
-    def take_screenshot(self):
-        """Handle screenshot capture process"""
-        self.screenshot_btn.config(state='disabled')
+    def take_screenshot(self, triggered_at=None):
+        """Handle screenshot capture process (button or hotkey)"""
+        self._start_capture(region=None, triggered_at=triggered_at)
+    
+    def recapture_region(self):
+        """Capture only the screen area of the last crop"""
+        if self.last_region:
+            self._start_capture(region=self.last_region)
+    
+    def _start_capture(self, region, triggered_at=None):
+        """Hide the window only if it is in the way, then grab immediately"""
+        if self.capturing:
+            return
+        self.capturing = True
+        if triggered_at is None:
+            triggered_at = time.perf_counter()
+        
+        self.screenshot_btn.config(state='disabled', text="Capturing...")
+        self.recapture_btn.config(state='disabled')
         self.crop_btn.config(state='disabled')
         self.save_btn.config(state='disabled')
-        self.countdown(1)
-    
-    def countdown(self, count):
-        """Countdown before taking screenshot"""
-        if count > 0:
-            self.screenshot_btn.config(text=f"Taking screenshot in {count}...")
-            self.root.after(1000, lambda: self.countdown(count - 1))
+        
+        monitor = self.monitor_combo.current()
+        if self._window_overlaps(region, monitor):
+            self.root.withdraw()
+            self.root.update_idletasks()
+            self.root.after(self.HIDE_SETTLE_MS,
+                            lambda: self._capture_and_preview(region, monitor, triggered_at, hidden=True))
         else:
-            self.screenshot_btn.config(text="Capturing...")
-            self.root.after(100, self._capture_and_preview)
+            self._capture_and_preview(region, monitor, triggered_at)
+    
+    def _window_overlaps(self, region, monitor):
+        """Whether our window intersects the area about to be grabbed"""
+        if region is None:
+            if monitor <= 0:
+                return True  # The virtual desktop always contains the window
+            monitors = self.screenshot_manager.list_monitors()
+            if monitor > len(monitors):
+                return True
+            m = monitors[monitor - 1]
+            region = (m["left"], m["top"], m["width"], m["height"])
+        left, top, width, height = region
+        wx, wy = self.root.winfo_rootx(), self.root.winfo_rooty()
+        ww, wh = self.root.winfo_width(), self.root.winfo_height()
+        return wx < left + width and left < wx + ww and wy < top + height and top < wy + wh
     
-    def _capture_and_preview(self):
+    def _capture_and_preview(self, region=None, monitor=0, triggered_at=None, hidden=False):
         """Capture screenshot and show preview"""
-        image = self.screenshot_manager.capture_screen()
+        try:
+            if region:
+                image = self.screenshot_manager.capture_screen(region=region, triggered_at=triggered_at)
+            else:
+                image = self.screenshot_manager.capture_screen(monitor=monitor, triggered_at=triggered_at)
+        finally:
+            if hidden:
+                self.root.deiconify()
+            self.capturing = False
         if image:
-            self.current_image = image
-            self._update_preview(image)
-            self.screenshot_btn.config(text="Take Screenshot", state='normal')
+            area = self.screenshot_manager.last_capture_area
+            self.current_view = CropView(image)
+            self.capture_origin = (area["left"], area["top"])
+            self.capture_monitor = self.screenshot_manager.last_capture_monitor
+            self.captured_at = self.screenshot_manager.last_capture_time
+            self.history_entry = self.screenshot_manager.last_entry
+            self._update_preview(self.current_view)
+            self._update_crop_buttons()
+            self._update_history_controls()
             self.crop_btn.config(state='normal')
             self.save_btn.config(state='normal')
+        self.screenshot_btn.config(text="Take Screenshot", state='normal')
+        if self.last_region:
+            self.recapture_btn.config(state='normal')
+    
+    def show_older(self):
+        self._show_history(-1)
+    
+    def show_newer(self):
+        self._show_history(1)
+    
+    def _show_history(self, step):
+        """Show the capture step places newer (or older, if negative) than the current one"""
+        if self.history is None or self.history_entry is None or self.capturing:
+            return
+        entry = self.history.neighbour(self.history_entry.id, step)
+        image = self.history.image(entry.id) if entry is not None else None
+        if image is None:
+            return
+        area = entry.metadata["area"]
+        self.history_entry = entry
+        self.current_view = CropView(image)
+        self.capture_origin = (area["left"], area["top"])
+        self.capture_monitor = entry.metadata["monitor"]
+        self.captured_at = entry.metadata["captured_at"]
+        self._update_preview(self.current_view)
+        self._update_crop_buttons()
+        self._update_history_controls()
     
-    def _update_preview(self, image):
-        """Update canvas with preview of the image"""
+    def _update_history_controls(self):
+        """Enable the history buttons that lead somewhere and refresh the memory report"""
+        if self.history is None or self.history_entry is None:
+            return
+        entry_id = self.history_entry.id
+        has_older = self.history.neighbour(entry_id, -1) is not None
+        has_newer = self.history.neighbour(entry_id, 1) is not None
+        self.older_btn.config(state='normal' if has_older else 'disabled')
+        self.newer_btn.config(state='normal' if has_newer else 'disabled')
+        entries = self.history.entries
+        position = next((i for i, entry in enumerate(entries, start=1) if entry.id == entry_id), len(entries))
+        self.history_label.config(text=f"Capture {position} of {len(entries)}: {self.history.report()}")
+    
+    def _update_preview(self, view):
+        """Update canvas with preview of the crop view"""
         try:
-            # Calculate preview size
-            aspect_ratio = image.width / image.height
-            preview_width = self.PREVIEW_WIDTH
-            preview_height = int(preview_width / aspect_ratio)
-            
-            if preview_height > self.PREVIEW_HEIGHT:
-                preview_height = self.PREVIEW_HEIGHT
-                preview_width = int(preview_height * aspect_ratio)
+            # Fit the preview to the canvas as currently laid out
+            area_width, area_height = self._preview_area()
+            with tracing.span("preview.render"):
+                self.photo_image, (preview_width, preview_height) = self.preview_renderer.render_photo(
+                    view.source, area_width, area_height, box=view.box)
             
             # Store preview dimensions for coordinate mapping
             self.preview_width = preview_width
             self.preview_height = preview_height
-            self.preview_scale_x = image.width / preview_width
-            self.preview_scale_y = image.height / preview_height
-            
-            # Create preview image
-            preview = image.resize((preview_width, preview_height))
-            
-            # Save temporary file for preview
-            temp_preview = "temp_preview.png"
-            preview.save(temp_preview)
-            
-            # Load with Tkinter
-            self.photo_image = tk.PhotoImage(file=temp_preview)
-            os.remove(temp_preview)
+            self.preview_scale_x = view.width / preview_width
+            self.preview_scale_y = view.height / preview_height
             
             # Clear and update canvas
             self.canvas.delete("all")
-            x = (self.PREVIEW_WIDTH - preview_width) // 2
-            y = (self.PREVIEW_HEIGHT - preview_height) // 2
+            self.crop_rect = None
+            x = (area_width - preview_width) // 2
+            y = (area_height - preview_height) // 2
             self.preview_x = x
             self.preview_y = y
             self.canvas.create_image(x, y, anchor=tk.NW, image=self.photo_image)
             
             # Enable analyze button when we have an image
-            self.analyze_btn.config(state='normal')
-            
+            if self._chat_error is None:
+                self.analyze_btn.config(state='normal')
+        
         except Exception as e:
             logging.error(f"Error updating preview: {e}", exc_info=True)
     
+    def _preview_area(self):
+        """Size available for the preview inside the canvas"""
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            return self.PREVIEW_WIDTH, self.PREVIEW_HEIGHT
+        return width, height
+    
+    def _on_canvas_resize(self, event):
+        """Re-render the preview once resizing settles"""
+        if self._resize_job is not None:
+            self.root.after_cancel(self._resize_job)
+        self._resize_job = self.root.after(self.RESIZE_DEBOUNCE_MS, self._refresh_preview)
+    
+    def _refresh_preview(self):
+        self._resize_job = None
+        if self.current_view:
+            self._update_preview(self.current_view)
+    
     def start_crop(self):
         """Start crop mode"""
         self.canvas.bind("<ButtonPress-1>", self.crop_start)
@@ -222,22 +543,20 @@ class ScreenshotUI:
         """Handle start of crop selection"""
         self.crop_start_x = event.x
         self.crop_start_y = event.y
+        # One rubber-band item per selection, moved rather than recreated
         if self.crop_rect:
-            self.canvas.delete(self.crop_rect)
+            self.canvas.coords(self.crop_rect, event.x, event.y, event.x, event.y)
+        else:
+            self.crop_rect = self.canvas.create_rectangle(event.x, event.y, event.x, event.y, outline='red')
     
     def crop_drag(self, event):
         """Handle crop selection dragging"""
         if self.crop_rect:
-            self.canvas.delete(self.crop_rect)
-        self.crop_rect = self.canvas.create_rectangle(
-            self.crop_start_x, self.crop_start_y,
-            event.x, event.y,
-            outline='red'
-        )
+            self.canvas.coords(self.crop_rect, self.crop_start_x, self.crop_start_y, event.x, event.y)
     
     def crop_end(self, event):
         """Handle end of crop selection"""
-        if not self.current_image:
+        if not self.current_view:
             return
         
         # Get coordinates relative to preview image
@@ -252,51 +571,210 @@ class ScreenshotUI:
         x2 = max(0, min(x2, self.preview_width))
         y2 = max(0, min(y2, self.preview_height))
         
-        # Convert preview coordinates to original image coordinates
+        # Convert preview coordinates to view coordinates
         orig_x1 = int(x1 * self.preview_scale_x)
         orig_y1 = int(y1 * self.preview_scale_y)
         orig_x2 = int(x2 * self.preview_scale_x)
         orig_y2 = int(y2 * self.preview_scale_y)
         
-        logging.debug(f"Cropping original image at coordinates: ({orig_x1}, {orig_y1}, {orig_x2}, {orig_y2})")
+        logging.debug("Cropping view at coordinates: (%d, %d, %d, %d)", orig_x1, orig_y1, orig_x2, orig_y2)
         
-        # Crop the original image
-        cropped = self.screenshot_manager.crop_image(self.current_image, (orig_x1, orig_y1, orig_x2, orig_y2))
-        if cropped:
-            self.current_image = cropped
-            self._update_preview(cropped)
+        # Narrow the view; the captured image itself is left untouched
+        if self.current_view.crop((orig_x1, orig_y1, orig_x2, orig_y2)):
+            self._update_preview(self.current_view)
+            self._update_crop_buttons()
+            self._remember_region()
+        elif self.crop_rect:
+            self.canvas.delete(self.crop_rect)
+            self.crop_rect = None
         
         # Unbind crop events
         self.canvas.unbind("<ButtonPress-1>")
         self.canvas.unbind("<B1-Motion>")
         self.canvas.unbind("<ButtonRelease-1>")
     
+    def undo_crop(self):
+        """Return to the previous crop of the capture"""
+        if self.current_view and self.current_view.undo():
+            self._update_preview(self.current_view)
+            self._update_crop_buttons()
+            self._remember_region()
+    
+    def redo_crop(self):
+        """Re-apply an undone crop"""
+        if self.current_view and self.current_view.redo():
+            self._update_preview(self.current_view)
+            self._update_crop_buttons()
+            self._remember_region()
+    
+    def _unless_typing(self, action):
+        """Run a shortcut's action unless a text entry has the focus"""
+        if not isinstance(self.root.focus_get(), tk.Entry):
+            action()
+    
+    def _remember_region(self):
+        """Remember the view in screen coordinates so it can be re-grabbed directly"""
+        left = self.capture_origin[0] + self.current_view.box[0]
+        top = self.capture_origin[1] + self.current_view.box[1]
+        self.last_region = (left, top, self.current_view.width, self.current_view.height)
+        self.recapture_btn.config(state='normal')
+    
+    def _update_crop_buttons(self):
+        self.undo_btn.config(state='normal' if self.current_view.can_undo else 'disabled')
+        self.redo_btn.config(state='normal' if self.current_view.can_redo else 'disabled')
+    
+    def _capture_metadata(self):
+        """Store metadata for the current view: monitor, screen region, capture time"""
+        left = self.capture_origin[0] + self.current_view.box[0]
+        top = self.capture_origin[1] + self.current_view.box[1]
+        return {
+            "monitor": self.capture_monitor,
+            "region": (left, top, self.current_view.width, self.current_view.height),
+            "captured_at": self.captured_at,
+        }
+    
+    def _record_capture(self, image, metadata, saved_path=None):
+        """Index a capture in the store (called from worker threads)"""
+        try:
+            self.store.add_capture(image, saved_path=saved_path, **metadata)
+        except Exception as e:
+            logging.error(f"Could not record capture in store: {e}", exc_info=True)
+    
     def save_screenshot(self):
-        """Save the current screenshot"""
-        if self.current_image:
-            self.screenshot_manager.save_screenshot(self.current_image)
+        """Queue the current screenshot for saving in the background"""
+        if not self.current_view:
+            return
+        image = self.current_view.materialize()
+        metadata = self._capture_metadata()
+        
+        def saved(path, error):
+            if not error:
+                self._record_capture(image, metadata, saved_path=path)
+            self._save_results.put("Save failed" if error else "Saved")
+        
+        if self.save_writer.submit(image, callback=saved) is None:
+            self._flash_save_status("Save queue full")
+            return
+        self._saves_pending += 1
+        if self._saves_pending == 1:
+            self.root.after(self.SAVE_POLL_MS, self._poll_saves)
+    
+    def _poll_saves(self):
+        """Show the results of finished saves (Tk calls from the writer thread aren't safe)"""
+        while True:
+            try:
+                text = self._save_results.get_nowait()
+            except queue.Empty:
+                break
+            self._saves_pending -= 1
+            self._flash_save_status(text)
+        if self._saves_pending:
+            self.root.after(self.SAVE_POLL_MS, self._poll_saves)
+    
+    def _flash_save_status(self, text):
+        """Show a save result on the save button for a moment"""
+        self.save_btn.config(text=text)
+        self.root.after(1500, lambda: self.save_btn.config(text="Save Screenshot"))
     
     def analyze_screenshot(self):
         """Send screenshot to Claude for analysis"""
-        if not self.current_image:
+        if not self.current_view:
             return
             
         self.analyze_btn.config(state='disabled', text="Analyzing...")
-        self.chat_text.insert(tk.END, "\n\nAnalyzing screenshot...\n")
-        self.chat_text.see(tk.END)
-        
-        # Run analysis in a separate thread to keep UI responsive
-        def run_analysis():
-            response = self.chat_manager.analyze_image(self.current_image)
-            
-            # Update UI in main thread
-            self.root.after(0, lambda: self._update_chat(response))
-        
-        import threading
-        threading.Thread(target=run_analysis, daemon=True).start()
+        self.chat_view.add("status", "Analyzing screenshot...")
+        image = self.current_view.materialize()
+        metadata = self._capture_metadata()
+        auto_trim = self.auto_trim_var.get()
+        
+        def analyze():
+            self.chat_manager.auto_trim = auto_trim
+            return self.chat_manager.stream_analysis(image)
+        
+        # Hashing and writing the capture would delay the request; index it
+        # once the answer is in
+        self._start_stream(analyze, after=lambda: self._record_capture(image, metadata))
+    
+    def ask_followup(self):
+        """Ask Claude a follow-up question about the analyzed screenshot"""
+        question = self.followup_var.get().strip()
+        if not question or str(self.ask_btn['state']) == 'disabled':
+            return
+        self.followup_var.set("")
+        self.analyze_btn.config(state='disabled')
+        self.chat_view.add("user", question)
+        self._start_stream(lambda: self.chat_manager.stream_followup(question))
+    
+    def _start_stream(self, make_stream, after=None):
+        """Run a ChatManager stream on a worker thread and render it as it arrives
+        
+        after, if given, runs on the worker thread once the stream has ended.
+        """
+        self.streaming = True
+        self.followup_entry.config(state='disabled')
+        self.ask_btn.config(state='disabled')
+        self.chat_view.begin("assistant")
+        
+        # Stream in a separate thread; the UI thread drains the queue on a timer
+        # so a burst of tiny deltas becomes one Text insert per flush
+        chunks = queue.Queue()
+        
+        def run_stream():
+            try:
+                for chunk in make_stream():
+                    chunks.put(chunk)
+            except Exception as e:
+                # Already logged by ChatManager; show it where the answer would be
+                chunks.put(f"Error: {e}")
+            finally:
+                chunks.put(None)
+                if after is not None:
+                    after()
+        
+        threading.Thread(target=run_stream, daemon=True).start()
+        self.root.after(self.STREAM_FLUSH_MS, lambda: self._flush_stream(chunks))
+    
+    def _flush_stream(self, chunks):
+        """Move streamed text from the worker queue into the chat panel"""
+        pending = []
+        done = False
+        while True:
+            try:
+                chunk = chunks.get_nowait()
+            except queue.Empty:
+                break
+            if chunk is None:
+                done = True
+                break
+            pending.append(chunk)
+        
+        if pending:
+            with tracing.span("ui.chat_update"):
+                self.chat_view.extend("".join(pending))
+        if done:
+            self.streaming = False
+            self.chat_view.finish()
+            if self._chat_error is not None:
+                self.analyze_btn.config(state='disabled', text="Analyze with Claude")
+                return
+            self.analyze_btn.config(state='normal', text="Analyze with Claude")
+            if self._chat_manager is not None and self._chat_manager.conversation:
+                self.followup_entry.config(state='normal')
+                self.ask_btn.config(state='normal')
+        else:
+            self.root.after(self.STREAM_FLUSH_MS, lambda: self._flush_stream(chunks))
     
-    def _update_chat(self, message):
-        """Update chat with new message"""
-        self.chat_text.insert(tk.END, f"\nClaude: {message}\n")
-        self.chat_text.see(tk.END)
-        self.analyze_btn.config(state='normal', text="Analyze with Claude") 
\ No newline at end of file
+    def _on_close(self):
+        """Release the hotkey and capture session before closing"""
+        self.hotkey.stop()
+        self.save_writer.close()
+        # An import already in progress can't be interrupted; wait it out
+        self._loader.shutdown(wait=True, cancel_futures=True)
+        self.chat_log.close()
+        if self._chat_manager is not None:
+            self._chat_manager.close()
+        if self.capture_session is not None:
+            self.capture_session.close()
+        if self.history is not None:
+            self.history.close()
+        self.root.destroy()
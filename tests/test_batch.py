@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+from PIL import Image
+import pytest
+
+from benchmarks.fake_anthropic import FakeAnthropicServer
+from example1.batch import AsyncRateLimiter, BatchAnalyzer
+
+
+@pytest.fixture
+def server():
+    with FakeAnthropicServer(latency=0.01, chunk_delay=0) as server:
+        yield server
+
+
+def run_batch(server, count, configure=lambda analyzer: None):
+    async def main():
+        analyzer = BatchAnalyzer(api_key="test", base_url=server.base_url, concurrency=8)
+        configure(analyzer)
+        try:
+            start = time.perf_counter()
+            results = await analyzer.analyze_all([Image.new("RGB", (32, 32)) for _ in range(count)], "Hi")
+            return results, time.perf_counter() - start
+        finally:
+            await analyzer.close()
+    return asyncio.run(main())
+
+
+def test_rate_limiter_allows_a_burst_then_the_rate():
+    async def main():
+        limiter = AsyncRateLimiter(per_minute=600, burst=2)
+        start = time.perf_counter()
+        for _ in range(7):
+            await limiter.acquire()
+        return time.perf_counter() - start
+    # Two from the burst, then five at ten a second
+    assert 0.45 <= asyncio.run(main()) < 0.8
+
+
+def test_rate_limiter_takes_requests_larger_than_the_bucket():
+    async def main():
+        limiter = AsyncRateLimiter(per_minute=6000, burst=10)
+        await limiter.acquire(1000)
+        return limiter.tokens
+    assert asyncio.run(main()) == pytest.approx(0, abs=1)
+
+
+def test_batch_keeps_to_the_request_rate(server):
+    def configure(analyzer):
+        analyzer.request_limiter = AsyncRateLimiter(per_minute=600, burst=2)
+    results, elapsed = run_batch(server, 8, configure)
+    assert all(result.ok for result in results)
+    assert server.requests == 8
+    assert elapsed >= 0.55
+
+
+def test_batch_charges_the_token_bucket_what_requests_cost(server):
+    limiters = []
+
+    def configure(analyzer):
+        analyzer.token_limiter = AsyncRateLimiter(per_minute=60, burst=100000)
+        limiters.append(analyzer.token_limiter)
+    results, _ = run_batch(server, 4, configure)
+    spent = sum(result.input_tokens for result in results)
+    assert limiters[0].tokens == pytest.approx(100000 - spent, abs=10)
+
+
+def test_batch_retries_rate_limited_requests(server):
+    server.script = [(429, "0.2")]
+    results, elapsed = run_batch(server, 1)
+    assert results[0].ok
+    assert results[0].attempts == 2
+    assert elapsed >= 0.2
@@ -0,0 +1,176 @@
+import threading
+import time
+
+from PIL import Image, ImageDraw
+import pytest
+
+from benchmarks.fake_anthropic import FakeAnthropicServer
+from example1.chat_manager import ChatManager, NoScreenshot
+from example1.transport import NotConfigured, RequestRejected, Transport
+
+
+class HeldSummaries:
+    """A Transport whose create() calls (summaries) wait until released"""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.released = threading.Event()
+        self.summaries = 0
+
+    def __getattr__(self, name):
+        return getattr(self.transport, name)
+
+    def create(self, **request):
+        self.summaries += 1
+        assert self.released.wait(10)
+        return self.transport.create(**request)
+
+
+@pytest.fixture
+def server():
+    with FakeAnthropicServer(latency=0.01, chunk_delay=0) as server:
+        yield server
+
+
+def chat_for(transport):
+    chat = ChatManager(cache=False, transport=transport)
+    chat.HISTORY_TOKEN_BUDGET = 40
+    chat.KEEP_RECENT_TURNS = 2
+    return chat
+
+
+def test_compaction_does_not_hold_up_the_next_answer(server):
+    transport = HeldSummaries(Transport("test", base_url=server.base_url))
+    chat = chat_for(transport)
+    assert chat.analyze(Image.new("RGB", (64, 64)), "What is this?").ok
+    while chat._compaction is None:
+        assert chat.ask("And then?").ok
+    # The summary is still being written; the next question goes out in full
+    turns = len(chat.conversation)
+    assert "".join(chat.stream_followup("Anything else?")) == server.reply
+    assert len(chat.conversation) == turns + 2
+    assert not transport.released.is_set()
+
+    transport.released.set()
+    chat._apply_compaction(wait=True)
+    assert transport.summaries == 1
+    assert chat.conversation[0]["content"] == "What is this?"
+    assert chat.conversation[1]["content"] == f"Summary of the conversation so far: {server.reply}"
+    assert len(chat.conversation) == 2 + 2 + 2
+    transport.close()
+
+
+def test_empty_summary_falls_back_to_truncation(server):
+    transport = HeldSummaries(Transport("test", base_url=server.base_url))
+    chat = chat_for(transport)
+    assert chat.analyze(Image.new("RGB", (64, 64)), "What is this?").ok
+    while chat._compaction is None:
+        chat.ask("And then?")
+    server.reply = ""
+    transport.released.set()
+    chat._apply_compaction(wait=True)
+    assert chat.conversation[1]["content"].startswith("Summary of the conversation so far: Assistant: Fake")
+    transport.close()
+
+
+def test_new_screenshot_discards_a_pending_summary(server):
+    transport = HeldSummaries(Transport("test", base_url=server.base_url))
+    chat = chat_for(transport)
+    chat.analyze(Image.new("RGB", (64, 64)), "What is this?")
+    while chat._compaction is None:
+        chat.ask("And then?")
+    chat.analyze(Image.new("RGB", (64, 64), "white"), "And this?")
+    transport.released.set()
+    chat._apply_compaction(wait=True)
+    assert [turn["content"] for turn in chat.conversation] == ["And this?", server.reply]
+    transport.close()
+
+
+def test_close_does_not_wait_for_a_pending_summary(server):
+    transport = HeldSummaries(Transport("test", base_url=server.base_url))
+    chat = chat_for(transport)
+    chat.analyze(Image.new("RGB", (64, 64)), "What is this?")
+    while chat._compaction is None:
+        chat.ask("And then?")
+    start = time.perf_counter()
+    chat.close()
+    assert time.perf_counter() - start < 1.0
+    assert chat._compaction is None
+    with pytest.raises(RuntimeError):
+        chat._compactor.submit(print)
+    transport.released.set()
+    transport.close()
+
+
+def test_default_cache_answers_a_blinking_cursor(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    transport = Transport("test", base_url=server.base_url, prewarm=False)
+    chat = ChatManager(transport=transport)
+    image = Image.new("RGB", (800, 600), "white")
+    ImageDraw.Draw(image).text((20, 20), "Traceback (most recent call last):", fill="black")
+    assert not chat.analyze(image, "What is this?").cached
+    
+    blink = image.copy()
+    ImageDraw.Draw(blink).rectangle((230, 20, 231, 33), fill="black")
+    result = chat.analyze(blink, "What is this?")
+    assert result.cached and result.text == server.reply
+    assert server.requests == 1
+    
+    edited = image.copy()
+    ImageDraw.Draw(edited).text((20, 20), "ValueError: unexpected state", fill="black")
+    assert not chat.analyze(edited, "What is this?").cached
+    transport.close()
+
+
+def test_tiled_analysis_sends_every_tile_at_once(server):
+    server.latency = 0.5
+    transport = Transport("test", base_url=server.base_url, prewarm=False)
+    chat = ChatManager(cache=False, transport=transport)
+    image = Image.new("RGB", (1000, 600))
+    result = chat.analyze_tiled(image, "What is this?", tile_size=256, overlap=16)
+    assert result.ok
+    assert result.text.count(server.reply) == 15
+    assert result.attempts == 15
+    # Fifteen tiles, one round of requests
+    assert result.latency < 2 * server.latency
+    transport.close()
+
+
+def test_tiled_analysis_fails_only_when_every_tile_does(server):
+    server.failure_rate = 1.0
+    server.failure_statuses = (400,)
+    transport = Transport("test", base_url=server.base_url, prewarm=False)
+    chat = ChatManager(cache=False, transport=transport)
+    result = chat.analyze_tiled(Image.new("RGB", (600, 300)), "What is this?", tile_size=256, overlap=16)
+    assert not result.ok
+    assert result.text is None
+    transport.close()
+
+
+def test_follow_ups_report_typed_errors(server):
+    transport = Transport("test", base_url=server.base_url, prewarm=False)
+    chat = ChatManager(cache=False, transport=transport)
+    assert isinstance(chat.ask("Anything?").error, NoScreenshot)
+    with pytest.raises(NoScreenshot):
+        list(chat.stream_followup("Anything?"))
+
+    assert chat.analyze(Image.new("RGB", (64, 64)), "What is this?").ok
+    result = chat.ask("And then?")
+    assert result.ok and result.text == server.reply and result.attempts == 1
+
+    server.failure_rate = 1.0
+    server.failure_statuses = (400,)
+    result = chat.ask("And then?")
+    assert isinstance(result.error, RequestRejected) and result.text is None
+    with pytest.raises(RequestRejected):
+        list(chat.stream_followup("And then?"))
+    transport.close()
+
+
+def test_unconfigured_follow_ups(monkeypatch):
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    monkeypatch.setattr("example1.chat_manager.load_dotenv", lambda: None)
+    chat = ChatManager(cache=False)
+    assert isinstance(chat.ask("Anything?").error, NotConfigured)
+    with pytest.raises(NotConfigured):
+        list(chat.stream_analysis(Image.new("RGB", (64, 64))))
@@ -0,0 +1,80 @@
+import json
+
+from PIL import Image
+import pytest
+
+from benchmarks.fake_anthropic import FakeAnthropicServer
+from example1.cli import main
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    with FakeAnthropicServer(latency=0.01, chunk_delay=0) as server:
+        yield server
+
+
+@pytest.fixture
+def images(tmp_path):
+    directory = tmp_path / "screenshots"
+    (directory / "older").mkdir(parents=True)
+    for i, name in enumerate(["a.png", "b.png", "older/c.png", "older/d.jpg"]):
+        Image.new("RGB", (64, 48), (i * 60, 0, 0)).save(directory / name)
+    return directory
+
+
+def analyze_dir(server, images, output):
+    return main(["analyze-dir", str(images), "-o", str(output), "--workers", "1", "--base-url", server.base_url])
+
+
+def records(output):
+    """Complete records in the results file"""
+    result = []
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result.append(json.loads(line))
+            except json.JSONDecodeError:
+                pass
+    return result
+
+
+def test_resumes_where_the_last_run_stopped(server, images, tmp_path):
+    output = tmp_path / "analyses.jsonl"
+    server.script = [(400, None)]
+    assert analyze_dir(server, images, output) == 1
+    first = records(output)
+    assert len(first) == 4
+    failed = [record["path"] for record in first if record["error"]]
+    assert len(failed) == 1
+
+    # Only the failed image is sent again
+    assert analyze_dir(server, images, output) == 0
+    assert server.requests == 5
+    second = records(output)[4:]
+    assert [record["path"] for record in second] == failed
+    assert second[0]["text"] == server.reply
+
+    assert analyze_dir(server, images, output) == 0
+    assert server.requests == 5
+
+
+def test_resumes_after_a_line_cut_short(server, images, tmp_path):
+    output = tmp_path / "analyses.jsonl"
+    assert analyze_dir(server, images, output) == 0
+    lines = output.read_text(encoding="utf-8").splitlines(keepends=True)
+    # The last record was being written when the run was killed
+    output.write_text("".join(lines[:3]) + lines[3][:20], encoding="utf-8")
+
+    assert analyze_dir(server, images, output) == 0
+    assert server.requests == 5
+    assert len(records(output)) == 4
+
+
+def test_a_new_prompt_starts_over(server, images, tmp_path):
+    output = tmp_path / "analyses.jsonl"
+    assert analyze_dir(server, images, output) == 0
+    assert main(["analyze-dir", str(images), "-o", str(output), "--workers", "1", "--base-url", server.base_url,
+                 "-p", "List the error messages"]) == 0
+    assert server.requests == 8
+
@@ -0,0 +1,54 @@
+import os
+import shutil
+
+from PIL import Image
+import pytest
+
+from example1.image_history import ImageHistory, _filesystem_type
+
+
+def frame(shade):
+    return Image.new("RGB", (512, 512), (shade, shade, shade))
+
+
+def test_spilled_captures_page_back_in(tmp_path):
+    history = ImageHistory(budget_mb=2, directory=str(tmp_path))
+    entries = [history.add(frame(i)) for i in range(6)]
+    history.flush()
+    assert history.spills > 0
+    assert history.memory_bytes() <= history.budget
+    assert history.image(entries[0].id).getpixel((0, 0)) == (0, 0, 0)
+    history.close()
+
+
+def test_failed_spills_drop_captures_instead_of_retrying(tmp_path):
+    directory = tmp_path / "history"
+    os.makedirs(directory)
+    history = ImageHistory(budget_mb=2, directory=str(directory))
+    shutil.rmtree(directory)
+    for i in range(20):
+        history.add(frame(i))
+    history.flush()
+    assert history.spills == 0
+    assert history.dropped > 0
+    assert history.memory_bytes() <= history.budget
+    assert len(history) == 20 - history.dropped
+    history.close()
+
+
+def test_default_directory_is_under_the_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    stale = tmp_path / ".cache" / "history" / "999999999-abc"
+    os.makedirs(stale)
+    history = ImageHistory()
+    assert os.path.dirname(history.directory) == os.path.join(".cache", "history")
+    assert os.path.basename(history.directory).startswith(f"{os.getpid()}-")
+    assert not stale.exists()
+    history.close()
+    assert not os.path.exists(history.directory)
+
+
+def test_finds_the_filesystem_type():
+    if _filesystem_type("/proc") is None:
+        pytest.skip("no /proc/self/mounts")
+    assert _filesystem_type("/proc/self") == "proc"
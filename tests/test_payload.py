@@ -0,0 +1,70 @@
+import io
+
+from PIL import Image, ImageDraw
+
+from example1 import payload
+from example1.payload import estimate_png_bytes, prepare_image
+
+
+def text_screenshot(width=1920, height=1080):
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    for i in range(height // 20):
+        draw.text((20, 10 + i * 20), f"{i:3d}  result = compute_value(item_{i}, threshold={i * 7 % 13})",
+                  fill="black")
+    return image
+
+
+def png_bytes(image):
+    buffered = io.BytesIO()
+    image.save(buffered, format="PNG")
+    return buffered.tell()
+
+
+def test_stops_at_the_first_encoding_under_the_target():
+    result = prepare_image(text_screenshot())
+    assert result.content_type == "text"
+    assert result.encoded_bytes <= payload.ENCODE_TARGET_BYTES
+    assert result.media_type == "image/png"
+
+
+def test_tries_every_encoding_over_the_target(monkeypatch):
+    image = text_screenshot()
+    encoded = []
+    save = Image.Image.save
+
+    def counting_save(self, fp, format=None, **options):
+        encoded.append(format)
+        return save(self, fp, format=format, **options)
+    monkeypatch.setattr(Image.Image, "save", counting_save)
+    prepare_image(image)
+    assert encoded.count("WEBP") == 0
+
+    encoded.clear()
+    monkeypatch.setattr(payload, "ENCODE_TARGET_BYTES", 0)
+    prepare_image(image)
+    assert encoded.count("WEBP") == 1
+
+
+def test_estimates_the_full_size_png():
+    image = text_screenshot()
+    assert abs(estimate_png_bytes(image) / png_bytes(image) - 1) < 0.1
+
+
+def test_bytes_saved_is_against_the_full_size_png():
+    image = Image.effect_noise((2400, 1600), 64).convert("RGB")
+    result = prepare_image(image)
+    assert result.bytes_saved == result.legacy_bytes - result.encoded_bytes
+    assert abs(result.legacy_bytes / png_bytes(image) - 1) < 0.1
+    assert result.bytes_saved < result.raw_bytes - result.encoded_bytes
+
+
+def test_legacy_estimate_stays_off_the_request_path(monkeypatch):
+    estimates = []
+    estimate = payload.estimate_png_bytes
+    monkeypatch.setattr(payload, "estimate_png_bytes", lambda image: estimates.append(image) or estimate(image))
+    image = text_screenshot()
+    result = prepare_image(image)
+    assert estimates == []
+    assert result.legacy_bytes == result.legacy_bytes == estimate(image)
+    assert estimates == [image]
@@ -0,0 +1,81 @@
+from PIL import Image, ImageDraw
+
+from example1.response_cache import TILE_SIZE, ResponseCache
+
+MODEL = "test-model"
+PROMPT = "What error is shown?"
+
+
+def text_screenshot(lines):
+    image = Image.new("RGB", (1280, 800), "white")
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(lines):
+        draw.text((20, 10 + i * 19), line, fill="black")
+    return image
+
+
+def with_cursor(image, line=12, column=60):
+    """The screenshot with a text cursor drawn after a character"""
+    image = image.copy()
+    x, y = 20 + column * 6, 10 + line * 19
+    ImageDraw.Draw(image).rectangle((x, y, x + 1, y + 13), fill="black")
+    return image
+
+
+def lines(changed=()):
+    text = [f"{i:3d}  result = compute_value(item_{i}, threshold={i * 7 % 13})" for i in range(40)]
+    for i in changed:
+        text[i] = f"{i:3d}  raise ValueError('unexpected state in worker {i}')"
+    return text
+
+
+def test_identical_image_hits(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"))
+    cache.put(text_screenshot(lines()), PROMPT, MODEL, "answer")
+    assert cache.get(text_screenshot(lines()), PROMPT, MODEL) == "answer"
+    assert cache.get(text_screenshot(lines()), "Another question", MODEL) is None
+
+
+def test_disk_tier_survives_reopen(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    ResponseCache(path=path).put(text_screenshot(lines()), PROMPT, MODEL, "answer")
+    cache = ResponseCache(path=path)
+    assert cache.get(text_screenshot(lines()), PROMPT, MODEL) == "answer"
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_near_duplicate_text_screenshots_do_not_collide(tmp_path):
+    original = text_screenshot(lines())
+    edited = text_screenshot(lines(changed=(3,)))
+    
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"))
+    cache.put(original, PROMPT, MODEL, "answer about the original")
+    assert cache.get(edited, PROMPT, MODEL) is None
+    
+    # A rewritten line spans several squares, so even the fuzzy tier misses
+    fuzzy = ResponseCache(fuzzy_distance=1)
+    fuzzy.put(original, PROMPT, MODEL, "answer about the original")
+    for changed in range(40):
+        assert fuzzy.get(text_screenshot(lines(changed=(changed,))), PROMPT, MODEL) is None
+    assert fuzzy.stats()["fuzzy_hits"] == 0
+
+
+def test_fuzzy_tier_is_opt_in():
+    image = text_screenshot(lines())
+    cache = ResponseCache()
+    cache.put(image, PROMPT, MODEL, "answer")
+    assert cache.get(with_cursor(image), PROMPT, MODEL) is None
+
+
+def test_fuzzy_tier_matches_a_blinking_cursor(tmp_path):
+    image = text_screenshot(lines())
+    blink = with_cursor(image)
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"), fuzzy_distance=1)
+    cache.put(image, PROMPT, MODEL, "answer")
+    assert cache.get(blink, PROMPT, MODEL) == "answer"
+    assert cache.stats()["fuzzy_hits"] == 1
+    
+    # Also from the disk tier, and never across image sizes
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"), fuzzy_distance=1)
+    assert cache.get(blink, PROMPT, MODEL) == "answer"
+    assert cache.get(blink.crop((0, 0, 1280, 800 - TILE_SIZE)), PROMPT, MODEL) is None
@@ -0,0 +1,113 @@
+import http.client
+import io
+import json
+
+from PIL import Image
+import pytest
+
+from benchmarks.fake_anthropic import FakeAnthropicServer
+from benchmarks.fake_mss import LAYOUTS, FakeMSS
+from example1.service import CaptureService
+from example1.transport import Transport
+
+
+@pytest.fixture
+def api():
+    with FakeAnthropicServer(latency=0.01, chunk_delay=0) as api:
+        yield api
+
+
+@pytest.fixture
+def service(api, tmp_path, monkeypatch):
+    # The response cache lives under the working directory
+    monkeypatch.chdir(tmp_path)
+    transport = Transport("test", base_url=api.base_url, prewarm=False)
+    with CaptureService(port=0, backend=lambda: FakeMSS(LAYOUTS["1080p"]), transport=transport) as service:
+        yield service
+    transport.close()
+
+
+def request(service, method, path, body=None, headers=None, host=None):
+    port = service._server.server_address[1]
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    headers = dict(headers or {})
+    headers.setdefault("Authorization", f"Bearer {service.token}")
+    connection.putrequest(method, path, skip_host=True)
+    connection.putheader("Host", host or f"127.0.0.1:{port}")
+    for name, value in headers.items():
+        connection.putheader(name, value)
+    if body is not None:
+        connection.putheader("Content-Length", str(len(body)))
+    connection.endheaders(body)
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    return response.status, data
+
+
+def test_generates_a_token_when_none_is_given(service):
+    assert len(service.token) >= 32
+    with CaptureService(port=0, token="fixed", backend=lambda: FakeMSS(LAYOUTS["1080p"])) as other:
+        assert other.token == "fixed"
+
+
+def test_requires_the_token(service):
+    status, _ = request(service, "GET", "/stats", headers={"Authorization": "Bearer wrong"})
+    assert status == 401
+    assert request(service, "GET", "/stats")[0] == 200
+
+
+def test_rejects_foreign_host_headers(service):
+    assert request(service, "GET", "/capture", host="attacker.example:8765")[0] == 403
+    status, data = request(service, "GET", "/capture", host="localhost")
+    assert status == 200 and data.startswith(b"\x89PNG")
+
+
+def test_analyze_requires_a_json_content_type(service):
+    body = json.dumps({"prompt": "hi"}).encode()
+    for content_type in ("text/plain", "application/x-www-form-urlencoded", None):
+        headers = {"Content-Type": content_type} if content_type else {}
+        assert request(service, "POST", "/analyze", body, headers)[0] == 415
+
+
+def png(size=(64, 48)):
+    buffered = io.BytesIO()
+    Image.new("RGB", size, "navy").save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+def test_analyzes_an_uploaded_image(service, api):
+    status, data = request(service, "POST", "/analyze?prompt=What%20is%20this", png(),
+                           {"Content-Type": "image/png"})
+    assert status == 200
+    result = json.loads(data)
+    assert result["text"] == api.reply
+    assert result["capture"] is None
+    assert api.requests == 1
+
+
+def test_analyzes_a_capture(service, api):
+    body = json.dumps({"prompt": "What is this?", "region": [100, 100, 320, 200]}).encode()
+    status, data = request(service, "POST", "/analyze", body, {"Content-Type": "application/json"})
+    assert status == 200
+    result = json.loads(data)
+    assert result["text"] == api.reply
+    assert result["capture"]["area"]["width"] == 320
+
+
+@pytest.mark.parametrize("body, content_type", [
+    (b"notanimage", "image/png"),
+    (png()[:40], "image/png"),
+    (b"[1, 2]", "application/json"),
+    (b'"text"', "application/json"),
+    (b"{not json", "application/json"),
+    (b'{"region": 5}', "application/json"),
+    (b'{"region": [1, 2]}', "application/json"),
+    (b'{"region": ["a", 0, 10, 10]}', "application/json"),
+    (b'{"monitor": "first"}', "application/json"),
+])
+def test_bad_analyze_bodies_get_400(service, api, body, content_type):
+    status, data = request(service, "POST", "/analyze", body, {"Content-Type": content_type})
+    assert status == 400
+    assert "error" in json.loads(data)
+    assert api.requests == 0
@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+
+from benchmarks.fake_anthropic import FakeAnthropicServer
+from example1.transport import DeadlineExceeded, RequestRejected, RequestTimedOut, ServerError, Transport
+
+REQUEST = {"model": "test-model", "max_tokens": 16, "messages": [{"role": "user", "content": "Hi"}]}
+
+
+@pytest.fixture
+def server():
+    with FakeAnthropicServer(latency=0.01, chunk_delay=0) as server:
+        yield server
+
+
+@pytest.fixture
+def transport(server):
+    transport = Transport("test", base_url=server.base_url, prewarm=False, timeout=2.0, deadline=5.0)
+    yield transport
+    transport.close()
+
+
+@pytest.mark.parametrize("status", [429, 500, 529])
+def test_retries_transient_failures_after_retry_after(server, transport, status):
+    server.script = [(status, "0.3")]
+    start = time.perf_counter()
+    call = transport.send(**REQUEST)
+    assert call.text == server.reply
+    assert call.attempts == 2
+    assert time.perf_counter() - start >= 0.3
+
+
+def test_gives_up_after_max_retries(server, transport):
+    server.script = [(500, "0")] * (transport.max_retries + 1)
+    with pytest.raises(ServerError) as failure:
+        transport.send(**REQUEST)
+    assert failure.value.attempts == transport.max_retries + 1
+    assert server.requests == transport.max_retries + 1
+
+
+def test_does_not_retry_rejected_requests(server, transport):
+    server.script = [(400, None)]
+    with pytest.raises(RequestRejected) as failure:
+        transport.send(**REQUEST)
+    assert failure.value.attempts == 1
+    assert server.requests == 1
+
+
+def test_retry_after_past_the_deadline_fails_at_once(server, transport):
+    server.script = [(429, "30")]
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded) as failure:
+        transport.send(deadline=1.0, **REQUEST)
+    assert time.perf_counter() - start < 0.5
+    assert failure.value.attempts == 1
+    assert failure.value.status == 429
+
+
+def test_slow_attempts_stop_at_the_deadline(server):
+    server.latency = 2.0
+    transport = Transport("test", base_url=server.base_url, prewarm=False, timeout=0.2, deadline=0.6,
+                          max_retries=20)
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        transport.send(**REQUEST)
+    assert time.perf_counter() - start < 0.6 + 0.2 + 0.1
+    transport.close()
+
+
+def test_hedged_request_answers_first(server):
+    server.latency = 2.0
+    transport = Transport("test", base_url=server.base_url, prewarm=False, hedge_after=0.2)
+    
+    def speed_up():
+        # Only the first request is slow
+        while server.requests == 0:
+            time.sleep(0.005)
+        server.latency = 0.01
+    threading.Thread(target=speed_up, daemon=True).start()
+    start = time.perf_counter()
+    call = transport.send(**REQUEST)
+    assert time.perf_counter() - start < 1.0
+    assert call.hedged and call.text == server.reply
+    assert transport.hedges == 1
+    assert server.requests == 2
+    transport.close()
+
+
+def test_stream_failures_after_the_start_are_typed(server):
+    server.chunk_delay = 1.0
+    transport = Transport("test", base_url=server.base_url, prewarm=False, timeout=0.3)
+    with pytest.raises(RequestTimedOut) as failure:
+        with transport.stream(**REQUEST) as stream:
+            list(stream.text_stream)
+    assert failure.value.attempts == 1
+    assert server.requests == 1
+    transport.close()